@@ -0,0 +1,86 @@
+# AST memory benchmark.
+#
+# Parses a generated program of about 1M nodes, then rebuilds the same tree
+# with the old namedtuple-based node classes and with the current slot-based
+# ones, assigning return_type on every node the way the semantic phase does.
+# Reports the bytes per node each representation costs.
+#
+#   python benchmarks/ast_memory.py [statements]
+
+import collections
+import os
+import sys
+import tracemalloc
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parser
+from utils.ast_helper import Returnable
+
+
+# The node classes as they were before, kept here only for comparison
+class LegacyReturnable:
+    return_type = None
+
+def legacy_named_tuple(type_name, fields):
+    return types.new_class(type_name, (LegacyReturnable, collections.namedtuple(type_name, fields)))
+
+
+def program(statements):
+    # Each statement is Assign(Ident, BinOp(Ident, Ident)): 5 nodes
+    body = ''.join('        x <- x + y;\n' for _ in range(statements))
+    return 'class Main {\n    x : Int;\n    y : Int;\n    main() : Object {\n    {\n%s    }\n    };\n};\n' % body
+
+
+def rebuild(value, classes, counter):
+    if isinstance(value, Returnable):
+        cls = classes[type(value)]
+        node = cls(*[rebuild(v, classes, counter) for v in value])
+        node.return_type = 'Int'
+        counter[0] += 1
+        return node
+    if isinstance(value, tuple):
+        return tuple(rebuild(v, classes, counter) for v in value)
+    if isinstance(value, list):
+        return [rebuild(v, classes, counter) for v in value]
+    return value
+
+
+def measure(ast, classes):
+    counter = [0]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tree = rebuild(ast, classes, counter)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tree
+    return (after - before) / counter[0], counter[0]
+
+
+def main(statements=200000):
+    ast = parser.CoolParser().parse_string(program(statements))
+
+    node_classes = set()
+    stack = [ast]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, Returnable):
+            node_classes.add(type(value))
+            stack.extend(value)
+        elif isinstance(value, (tuple, list)):
+            stack.extend(value)
+
+    legacy = {cls: legacy_named_tuple(cls.__name__, ' '.join(cls._fields)) for cls in node_classes}
+    current = {cls: cls for cls in node_classes}
+
+    legacy_bytes, count = measure(ast, legacy)
+    slot_bytes, _ = measure(ast, current)
+    print('nodes:              %d' % count)
+    print('namedtuple + dict:  %.1f bytes/node' % legacy_bytes)
+    print('__slots__ nodes:    %.1f bytes/node' % slot_bytes)
+    print('saving:             %.0f%%' % (100.0 * (1 - slot_bytes / legacy_bytes)))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
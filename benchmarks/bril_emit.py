@@ -0,0 +1,92 @@
+# Bril emission throughput.
+#
+# Generates a Main class with many attributes and a main method making many
+# calls (a const per attribute, two consts and a call per call) and runs the
+# codegen passes over the checked program three ways: the old write (open,
+# append and close the output file for every line), the in-memory Emitter
+# saved once at the end, and streaming through one buffered file object, all
+# of them printing the text form.
+#
+#   python benchmarks/bril_emit.py [instructions]
+
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import driver
+from codegen import CodeGen
+
+
+def program(instructions):
+    half = instructions // 2
+    attrs = ''.join('    a%d : Int;\n' % i for i in range(half))
+    calls = ''.join('        f(%d, %d);\n' % (i, i + 1) for i in range(instructions - half))
+    return ('class Main {\n%s'
+            '    f(a : Int, b : Int) : Int { a + b };\n'
+            '    main() : Object {\n    {\n%s    }\n    };\n};\n' % (attrs, calls))
+
+
+class LegacyCodeGen(CodeGen):
+    def emit(self):
+        for s in self.program.to_text():
+            line = ""
+            line += s
+            line += "\n"
+            with open(self.out_file, "a") as f:
+                f.write(line)
+
+
+def run(gen):
+    gen.check_for_Main_class()
+    gen.check_for_main_method()
+    gen.analyzer_functions()
+    gen.emit()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(instructions=20000):
+    result = driver.compile(program(instructions), stages=('parse', 'semantic'), use_cache=False)
+    ast = result.semantic.ast
+    path = os.path.join(tempfile.mkdtemp(), 'bench.bril')
+
+    def legacy():
+        gen = LegacyCodeGen(ast=ast)
+        gen.out_file = path
+        run(gen)
+
+    def buffered():
+        gen = CodeGen(ast=ast)
+        gen.out_file = path
+        run(gen)
+        gen.save()
+
+    def streamed():
+        with open(path, 'w') as out:
+            run(CodeGen(ast=ast, out=out))
+
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+        times = [(label, timed(fn)) for label, fn in
+                 (('open per line', legacy), ('buffered + save', buffered), ('streamed', streamed))]
+
+    gen = CodeGen(ast=ast)
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+        run(gen)
+    emitted = sum(len(function.instrs) for function in gen.program.functions)
+    print('%d instructions emitted' % emitted)
+    for label, elapsed in times:
+        print('%-16s %10.0f instrs/s' % (label, emitted / elapsed))
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
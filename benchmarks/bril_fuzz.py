@@ -0,0 +1,133 @@
+# Differential test of the optimizer.
+#
+# Generates random Cool programs from a seed: nested loops and branches,
+# assignments inside expressions, conditionals used as values and calls to
+# small helpers. Each one is compiled at -O0 and at every level up to
+# max_level, run with utils.bril_interp, and the output (or the error) must
+# be the same as at -O0. Loops count a variable nothing else assigns, so
+# every program terminates. Prints the failing seeds and exits non-zero if
+# there are any; a single seed prints its program.
+#
+#   python benchmarks/bril_fuzz.py [seeds] [first_seed] [max_level]
+
+import io
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import driver
+from utils import bril_interp
+
+VARIABLES = ('a', 'b', 'd')
+
+
+class Generator:
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.loops = 0
+
+    def literal(self, low, high):
+        value = self.random.randint(low, high)
+        return '~%d' % -value if value < 0 else str(value)
+
+    def expr(self, depth):
+        r = self.random.random()
+        if depth <= 0 or r < 0.25:
+            if self.random.random() < 0.4:
+                return self.literal(0, 9)
+            return self.random.choice(VARIABLES)
+        if r < 0.5:
+            operator = self.random.choice('+-+-*')
+            return '(%s %s %s)' % (self.expr(depth - 1), operator, self.expr(depth - 1))
+        if r < 0.6:
+            return '(~%s)' % self.expr(depth - 1)
+        if r < 0.75:
+            return '(if %s then %s else %s fi)' % (self.cond(depth - 1), self.expr(depth - 1), self.expr(depth - 1))
+        if r < 0.85:
+            return '(%s <- %s)' % (self.random.choice(VARIABLES), self.expr(depth - 1))
+        return '%s(%s, %s)' % (self.random.choice('fg'), self.expr(depth - 1), self.expr(depth - 1))
+
+    def cond(self, depth):
+        r = self.random.random()
+        if r < 0.1:
+            return self.random.choice(('true', 'false'))
+        if r < 0.2:
+            return '(not %s)' % self.cond(depth - 1)
+        return '(%s %s %s)' % (self.expr(depth), self.random.choice(('<', '<=', '=')), self.expr(depth))
+
+    def statements(self, depth, indent):
+        return ''.join(self.statement(depth, indent) for _ in range(self.random.randint(1, 3)))
+
+    def statement(self, depth, indent):
+        pad = '    ' * indent
+        r = self.random.random()
+        if depth > 0 and r < 0.25:
+            return '%sif %s then {\n%s%s} else {\n%s%s} fi;\n' % (
+                pad, self.cond(2), self.statements(depth - 1, indent + 1), pad,
+                self.statements(depth - 1, indent + 1), pad)
+        if depth > 0 and r < 0.45:
+            counter = 'i%d' % self.loops
+            self.loops += 1
+            return '%s%s <- 0;\n%swhile %s < %d loop {\n%s%s    %s <- %s + 1;\n%s} pool;\n' % (
+                pad, counter, pad, counter, self.random.randint(1, 4),
+                self.statements(depth - 1, indent + 1), pad, counter, counter, pad)
+        if r < 0.6:
+            return '%soutput_int(%s);\n' % (pad, self.expr(2))
+        return '%s%s <- %s;\n' % (pad, self.random.choice(VARIABLES), self.expr(3))
+
+    def program(self):
+        body = self.statements(3, 3)
+        counters = ''.join(', i%d : Int <- 0' % i for i in range(self.loops))
+        initial = ', '.join('%s : Int <- %s' % (name, self.literal(-5, 9)) for name in VARIABLES)
+        return '''class Main inherits IO {
+    f(x : Int, y : Int) : Int { if x < y then x - y else x + y * 2 fi };
+    g(x : Int, y : Int) : Int { (x <- x + 1) * 2 - y };
+    main() : Object {
+        let %s%s in {
+%s            output_int(a);
+            output_int(b);
+            output_int(d);
+        }
+    };
+};
+''' % (initial, counters, body)
+
+
+def run(source, level):
+    result = driver.compile(source, use_cache=False, opt_level=level)
+    if result.errors:
+        return 'compile error: %s' % result.errors
+    out = io.StringIO()
+    try:
+        bril_interp.run(result.program.to_json(), out=out)
+    except bril_interp.BrilError as e:
+        return out.getvalue() + 'error: %s' % e
+    return out.getvalue()
+
+
+def main(seeds=300, first_seed=0, max_level=3):
+    failures = []
+    for seed in range(first_seed, first_seed + seeds):
+        source = Generator(seed).program()
+        expected = run(source, 0)
+        if expected.startswith('compile error'):
+            raise SystemExit('seed %d: %s\n%s' % (seed, expected, source))
+        for level in range(1, max_level + 1):
+            output = run(source, level)
+            if output != expected:
+                failures.append(seed)
+                print('seed %d: -O%d output differs from -O0' % (seed, level))
+                if seeds == 1:
+                    print(source)
+                    print('-O0: %r\n-O%d: %r' % (expected, level, output))
+                break
+    print('%d programs, -O1 to -O%d: %d failing%s'
+          % (seeds, max_level, len(failures), (' (seeds %s)' % ', '.join(map(str, failures))) if failures else ''))
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,192 @@
+# Optimizer effect on static and dynamic instruction counts.
+#
+# Compiles cool-examples/hello_world.cl and a few generated programs at each
+# optimization level, runs the Bril with utils.bril_interp and reports the
+# instructions in the program (static) and the instructions executed
+# (dynamic), multiplications among them, and the call sites the inliner
+# replaced with the code growth that cost. The printed output must be the
+# same at every level, and match EXPECTED for the programs listed there.
+#
+#   python benchmarks/bril_opt.py [max_level]
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import driver
+import optimizer
+from utils import bril_interp, pass_timer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def straight(statements=300):
+    # Unused attributes, repeated subexpressions and constant arithmetic
+    attrs = ''.join('    a%d : Int <- %d;\n' % (i, i) for i in range(20))
+    body = ''.join('            x <- (a1 + a2) * (a1 + a2) + (x * 3 - x * 3) + %d;\n' % i
+                   for i in range(statements))
+    return ('class Main inherits IO {\n    x : Int;\n%s'
+            '    main() : Object {\n        {\n%s            output_int(x);\n        }\n    };\n};\n'
+            % (attrs, body))
+
+
+def loop(iterations=2000):
+    # Loop-invariant products and a multiply by the induction variable
+    return '''class Main inherits IO {
+    main() : Object {
+        let i : Int <- 0, s : Int <- 0, a : Int <- 7, b : Int <- 9 in {
+            while i < %d loop {
+                s <- s + a * b + i * 4;
+                s <- s - (a * b);
+                i <- i + 1;
+            } pool;
+            output_int(s);
+        }
+    };
+};
+''' % iterations
+
+
+def calls(n=20):
+    # Many calls to a tiny helper inside a loop
+    return '''class Main inherits IO {
+    sq(x : Int) : Int { x * x };
+    add3(a : Int, b : Int, c : Int) : Int { a + b + c };
+    main() : Object {
+        let i : Int <- 0, s : Int <- 0 in {
+            while i < %d loop {
+                s <- add3(s, sq(i), sq(2));
+                i <- i + 1;
+            } pool;
+            output_int(s);
+        }
+    };
+};
+''' % (n * 50)
+
+
+def branches(iterations=500):
+    # Values only constant once the branch on a constant is known not taken
+    return '''class Main inherits IO {
+    main() : Object {
+        let i : Int <- 0, s : Int <- 0, k : Int <- 3, debug : Bool <- false in {
+            while i < %d loop {
+                if debug then s <- s + 1000 else s <- s + k * 2 fi;
+                if k = 3 then k <- 3 else k <- k + 1 fi;
+                i <- i + 1;
+            } pool;
+            output_int(s);
+            output_int(k);
+        }
+    };
+};
+''' % iterations
+
+
+def nested(n=60):
+    # Nested loops indexing a flattened n x n table: i * n and j * 3 per iteration
+    return '''class Main inherits IO {
+    main() : Object {
+        let i : Int <- 0, s : Int <- 0, n : Int <- %d in {
+            while i < n loop {
+                let j : Int <- 0 in while j < n loop {
+                    s <- s + (i * n + j * 3) / 7;
+                    j <- j + 1;
+                } pool;
+                i <- i + 1;
+            } pool;
+            output_int(s);
+        }
+    };
+};
+''' % n
+
+
+def fib(n=18):
+    # Recursive calls, branches and comparisons
+    return '''class Main inherits IO {
+    fib(n : Int) : Int { if n <= 1 then n else fib(n - 1) + fib(n - 2) fi };
+    main() : Object { output_int(fib(%d)) };
+};
+''' % n
+
+
+def order():
+    # Operands are read after the operands to their right ran, which may assign them;
+    # an if whose arm is a loop has no value
+    return '''class Main inherits IO {
+    f(a : Int, b : Int) : Int { a * 10 + b };
+    main() : Object {
+        let x : Int <- 1, y : Int <- 0, c : Bool <- true in {
+            output_int(x + (x <- 5));
+            x <- 1;
+            output_int(f(x, x <- 7));
+            x <- 2;
+            output_int((y <- x) + (y <- 3));
+            output_int(x * 2 + (x <- 4));
+            if c then while y < 6 loop y <- y + 1 pool else 3 fi;
+            output_int(y);
+        }
+    };
+};
+'''
+
+
+# Known output of the programs above, checked at every level
+EXPECTED = {
+    'order': '6\n17\n5\n8\n6\n',
+}
+
+
+def programs():
+    with open(os.path.join(ROOT, 'cool-examples', 'hello_world.cl')) as f:
+        yield 'hello_world.cl', f.read()
+    yield 'straight', straight()
+    yield 'loop', loop()
+    yield 'calls', calls()
+    yield 'branches', branches()
+    yield 'nested', nested()
+    yield 'fib', fib()
+    yield 'order', order()
+
+
+def measure(source, level):
+    records = []
+    pass_timer.subscribe(records.append)
+    start = time.perf_counter()
+    result = driver.compile(source, use_cache=False, opt_level=level)
+    elapsed = time.perf_counter() - start
+    pass_timer.unsubscribe(records.append)
+    inlining = [(r['inlined'], r['growth']) for r in records if r['pass'] == 'inline'] or [(0, 0)]
+    if result.errors:
+        raise SystemExit('O%d: %s' % (level, result.errors))
+    out = io.StringIO()
+    interpreter = bril_interp.Interpreter(result.program.to_json(), out)
+    dynamic = interpreter.run()
+    static = optimizer.instr_count(result.program)
+    return static, dynamic, interpreter.ops.get('mul', 0), inlining[0], out.getvalue(), elapsed
+
+
+def main(max_level=3):
+    print('%-16s %5s %8s %10s %8s %8s %7s %10s'
+          % ('program', 'level', 'static', 'dynamic', 'mul', 'inlined', 'growth', 'compile s'))
+    for name, source in programs():
+        baseline = None
+        for level in range(max_level + 1):
+            static, dynamic, muls, (inlined, growth), output, elapsed = measure(source, level)
+            if name in EXPECTED and output != EXPECTED[name]:
+                raise SystemExit('%s: output at -O%d is %r, expected %r' % (name, level, output, EXPECTED[name]))
+            if baseline is None:
+                baseline = (static, dynamic, output)
+            elif output != baseline[2]:
+                raise SystemExit('%s: output at -O%d differs from -O0' % (name, level))
+            print('%-16s %5s %8d %10d %8d %8d %7d %10.3f   (%.0f%% static, %.0f%% dynamic)'
+                  % (name, '-O%d' % level, static, dynamic, muls, inlined, growth, elapsed,
+                     100.0 * static / baseline[0], 100.0 * dynamic / baseline[1]))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,71 @@
+# Dead method and class elimination before codegen.
+#
+# Generates a program whose Main has many helper methods of which main only
+# calls a chain of a few, plus many classes nothing creates, and times the
+# backend (codegen and -O1) over the checked AST as is and after
+# reachability.prune, prune included, comparing the size of the output.
+#
+#   python benchmarks/dead_code.py [methods] [reached] [classes]
+
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import driver
+import optimizer
+import reachability
+from codegen import CodeGen
+
+
+def program(methods, reached, classes):
+    helpers = ''.join(
+        '    m%d(x : Int) : Int { let y : Int <- x * %d in if y < 100 then %s else y - 1 fi };\n'
+        % (i, i + 1, 'm%d(y + 1)' % (i + 1) if i + 1 < methods else 'y')
+        for i in range(methods))
+    others = ''.join(
+        'class K%d%s {\n    a%d : Int <- %d;\n    f(x : Int) : Int { x + a%d };\n    g() : Int { f(%d) };\n};\n'
+        % (i, ' inherits K%d' % (i - 1) if i % 10 else '', i, i, i, i) for i in range(classes))
+    # main enters the chain so that only the last `reached` helpers are called
+    return ('%sclass Main inherits IO {\n%s    main() : Object { output_int(m%d(1)) };\n};\n'
+            % (others, helpers, methods - reached))
+
+
+def backend(ast):
+    gen = CodeGen(ast=ast)
+    gen.check_for_Main_class()
+    gen.check_for_main_method()
+    gen.analyzer_functions()
+    optimizer.optimize(gen.program, 1)
+    gen.emit()
+    return gen
+
+
+def main(methods=3000, reached=20, classes=1000):
+    result = driver.compile(program(methods, reached, classes), stages=('parse', 'semantic'), use_cache=False)
+    if result.errors:
+        raise SystemExit(result.errors)
+    ast = result.semantic.ast
+
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+        start = time.perf_counter()
+        full = backend(ast)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pruned_ast, counters = reachability.prune(ast)
+        pruned = backend(pruned_ast)
+        pruned_time = time.perf_counter() - start
+
+    print('%d classes, %d methods in Main, %d reachable' % (len(ast), methods + 1, reached + 1))
+    print('dropped %(classes_dropped)d classes and %(methods_dropped)d methods' % counters)
+    for label, gen, elapsed in (('everything', full, full_time), ('pruned', pruned, pruned_time)):
+        print('%-12s %6d functions %8d instructions %10d bytes %8.3f s'
+              % (label, len(gen.program.functions), optimizer.instr_count(gen.program),
+                 len(gen.emitter.getvalue()), elapsed))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
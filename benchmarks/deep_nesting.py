@@ -0,0 +1,127 @@
+# Deep nesting benchmark for the explicit-stack traversal.
+#
+# Types and checks expressions nested 1M levels deep (a left-leaning `+`
+# chain, nested `let` and nested `if`) with the default recursion limit, then
+# compares throughput of utils.visitor.walk with a recursive driver running
+# the same handlers on a shallow, wide program.
+#
+#   python benchmarks/deep_nesting.py [depth] [statements]
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import semantic
+from utils.ast_helper import Returnable, type_fields as T
+from utils.symbol_table import SymbolTable
+from utils.visitor import walk
+
+
+def plus_chain(depth):
+    expr = T['Ident']('x')
+    for _ in range(depth):
+        expr = T['BinOp']('+', expr, T['Ident']('x'))
+    return expr
+
+
+def nested_let(depth):
+    expr = T['Ident']('v')
+    for _ in range(depth):
+        expr = T['Let']((T['Attr'](T['Ident']('v'), 'Int', T['Ident']('x')),), expr)
+    return expr
+
+
+def nested_if(depth):
+    expr = T['Ident']('x')
+    for _ in range(depth):
+        expr = T['If'](T['BinOp']('<', T['Ident']('x'), 1), expr, T['Ident']('x'))
+    return expr
+
+
+def wide(statements):
+    elements = tuple(
+        T['Assign'](T['Ident']('x'), T['BinOp']('+', T['BinOp']('*', T['Ident']('x'), 2), T['Ident']('x')))
+        for _ in range(statements)
+    )
+    return T['Block'](elements)
+
+
+def walk_recursive(node, handlers, *args):
+    handler = handlers.get(node.__class__)
+    if handler is not None:
+        pending = handler(node, *args)
+        if pending is not None:
+            for child in pending:
+                walk_recursive(child, handlers, *args)
+
+
+def checked_semantic():
+    with tempfile.NamedTemporaryFile('w', suffix='.cl', delete=False) as f:
+        f.write('class Main {\n    x : Int;\n    main() : Object { x };\n};\n')
+    try:
+        s = semantic.Semantic(f.name, use_cache=False)
+    finally:
+        os.remove(f.name)
+    s.map_and_create_initial_graph()
+    s.check_for_wrong_inheritance()
+    s.check_for_undefined_classes()
+    s.expand_inherited_classes()
+    s.create_method_map()
+    s.check_for_inheritance_cycles()
+    s.build_hierarchy()
+    return s, s.classes_map['Main']
+
+
+def scopes():
+    table = SymbolTable()
+    table.push()
+    table.define('x', 'Int')
+    return table
+
+
+def count(node):
+    total = 0
+    stack = [node]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, Returnable):
+            total += 1
+            stack.extend(value)
+        elif isinstance(value, tuple):
+            stack.extend(value)
+    return total
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(depth=1000000, statements=100000):
+    s, cl = checked_semantic()
+
+    for label, build in (('+ chain', plus_chain), ('let', nested_let), ('if', nested_if)):
+        expr = build(depth)
+        typed = timed(lambda: s.traverse_expression(expr, scopes(), cl))
+        print('%-8s depth %d: infer and check %.2fs, type %s' % (label, depth, typed, s.type_of(expr)))
+        try:
+            walk_recursive(expr, s.infer_handlers, scopes(), cl)
+            print('%-8s recursive driver: ok' % label)
+        except RecursionError:
+            print('%-8s recursive driver: RecursionError' % label)
+        del expr
+
+    expr = wide(statements)
+    nodes = count(expr)
+    iterative = min(timed(lambda: walk(expr, s.infer_handlers, scopes(), cl)) for _ in range(3))
+    recursive = min(timed(lambda: walk_recursive(expr, s.infer_handlers, scopes(), cl)) for _ in range(3))
+    print('wide     %d nodes: explicit stack %.0f nodes/s, recursive %.0f nodes/s'
+          % (nodes, nodes / iterative, nodes / recursive))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,45 @@
+# Cold-start budget for the front end.
+#
+# Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+# fails if the cumulative import time of the module goes over the budget.
+# Importing the compiler must not build lexer or parser tables.
+#
+#   python benchmarks/import_time.py [module] [budget_ms]
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time_us(module):
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import %s' % module],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = [f.strip() for f in line[len('import time:'):].split('|')]
+        if fields[2] == module:
+            return int(fields[1])
+    raise RuntimeError('module %s not found in -X importtime output' % module)
+
+
+def main(module='semantic', budget_ms=60.0):
+    # Take the best of a few runs, the first one also warms the .pyc files
+    best = min(import_time_us(module) for _ in range(5)) / 1000.0
+    print('import %s: %.1f ms (budget %.1f ms)' % (module, best, budget_ms))
+    if best > budget_ms:
+        print('FAIL: cold start regressed', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    module = args[0] if args else 'semantic'
+    budget = float(args[1]) if len(args) > 1 else 60.0
+    sys.exit(main(module, budget))
@@ -0,0 +1,83 @@
+# Incremental semantic check benchmark.
+#
+# Checks a generated program with many classes, then applies two edits and
+# compares semantic.recheck against checking the edited program from scratch:
+#   body edit:      one line inside one method body, nothing else depends on it
+#   signature edit: one method's return type, re-types its callers too
+# Parsing is not timed, both sides start from an already parsed AST.
+#
+#   python benchmarks/incremental_check.py [classes] [methods_per_class]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parser
+import semantic
+from utils.ast_helper import iter_nodes
+
+
+def program(classes, methods, edit=None):
+    out = []
+    for c in range(classes):
+        # A shallow tree, each class also calls into the class before it
+        parent = 'C%d' % (c // 10) if c >= 10 else 'IO'
+        out.append('class C%d inherits %s {' % (c, parent))
+        out.append('    x%d : Int;' % c)
+        for m in range(methods):
+            result = 'Object' if edit == 'signature' and (c, m) == (classes // 2, 0) else 'Int'
+            out.append('    m%d_%d(a : Int, b : Int) : %s {' % (c, m, result))
+            if edit == 'body' and (c, m) == (classes // 2, 0):
+                out.append('        let z : Int <- a * 3 + x%d in if z < b then z else b - a fi' % c)
+            else:
+                out.append('        let z : Int <- a + x%d * 2 in if z < b then z else b - a fi' % c)
+            out.append('    };')
+        if c:
+            out.append('    call%d() : Object { (new C%d).m%d_0(1, x%d) };' % (c, c - 1, c - 1, c))
+        out.append('};')
+    out.append('class Main { main() : Object { 0 }; };')
+    return '\n'.join(out) + '\n'
+
+
+def full(ast):
+    s = semantic.Semantic(ast=ast)
+    s.map_and_create_initial_graph()
+    s.check_for_wrong_inheritance()
+    s.check_for_undefined_classes()
+    s.expand_inherited_classes()
+    s.create_method_map()
+    s.check_for_inheritance_cycles()
+    s.build_hierarchy()
+    s.type_classes()
+    return s
+
+
+def types(s):
+    return [node.return_type for cl in s.classes_map.values() for node in iter_nodes(cl)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main(classes=2000, methods=5):
+    p = parser.CoolParser()
+
+    print('%d classes x %d methods' % (classes, methods))
+    for edit in ('body', 'signature'):
+        # recheck takes over the classes of the program it is given, start each edit afresh
+        base = full(p.parse_string(program(classes, methods)))
+        source = program(classes, methods, edit)
+        fresh, edited = p.parse_string(source), p.parse_string(source)
+        scratch, reference = timed(lambda: full(fresh))
+        incremental, (s, retyped) = timed(lambda: semantic.recheck(base, edited))
+        print('%-9s edit: full %.3fs, incremental %.3fs (%.1fx), %d classes re-typed, same types: %s'
+              % (edit, scratch, incremental, scratch / incremental, len(retyped), types(s) == types(reference)))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,126 @@
+# Inherited feature expansion benchmark.
+#
+# Builds a chain of classes, each overriding half of its parent's methods and
+# adding new ones, then compares the old expand_inherited_classes (deepcopy of
+# every parent feature into every child) with the shared feature tables.
+# Reports runtime and tracemalloc peak for both. The deepcopy expansion is
+# recursive, so the tables alone are then measured on chains up to max_depth
+# deep, with the typing pass run over them too; memory per class should stay
+# flat as the chain grows.
+#
+#   python benchmarks/inherited_features.py [depth] [methods_per_class] [max_depth]
+
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from copy import deepcopy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic import Semantic, Type, Method, Ident, Formal, Attr, BinOp
+
+
+def chain(depth, methods):
+    classes = []
+    parent = "Object"
+    for level in range(depth):
+        name = "C%d" % level
+        features = []
+        if level == 0:
+            features.append(Attr(Ident("x"), "Int", None))
+        for i in range(methods):
+            # Half of the names repeat at every level (overrides), half are new
+            method_name = "m%d" % i if i % 2 == 0 else "m%d_%d" % (i, level)
+            body = BinOp("+", Ident("a"), BinOp("*", Ident("x"), Ident("a")))
+            features.append(Method(Ident(method_name), "Int", (Formal(Ident("a"), "Int"),), body))
+        classes.append(Type(name, parent, features))
+        parent = name
+    return tuple(classes)
+
+
+def semantic_for(ast):
+    s = Semantic.__new__(Semantic)
+    s.classes_map = {"Object": Type("Object", None, [])}
+    s.graph = defaultdict(set)
+    s.feature_tables = {}
+    for cl in ast:
+        s.classes_map[cl.name] = cl
+        s.graph[cl.inherits].add(cl.name)
+    return s
+
+
+# The expansion as it was before feature tables, kept only for comparison
+def legacy_expand(s, start_class="Object"):
+    _class = s.classes_map[start_class]
+    if _class.inherits:
+        _class_parent = s.classes_map[_class.inherits]
+        attr_set_parent = [i for i in _class_parent.features if isinstance(i, Attr)]
+        all_methods_from_child = [i for i in _class.features if isinstance(i, Method)]
+        all_methods_from_parent = [i for i in _class_parent.features if isinstance(i, Method)]
+
+        def header_method_classes(method_set):
+            all_methods = {}
+            for method in method_set:
+                all_methods[method.ident.name] = {}
+                for formal in method.formals:
+                    all_methods[method.ident.name][formal.ident.name] = formal.type
+                all_methods[method.ident.name]['return'] = method.type
+            return all_methods
+
+        methods_child = header_method_classes(all_methods_from_child)
+        methods_parent = header_method_classes(all_methods_from_parent)
+        methods_in_child = set()
+        for method in all_methods_from_child:
+            methods_in_child.add(method.ident.name)
+            if method.ident.name in methods_parent:
+                if methods_parent[method.ident.name] != methods_child[method.ident.name]:
+                    raise Exception("Erro de redefinicao")
+        for method in all_methods_from_parent:
+            if method.ident.name not in methods_in_child:
+                _class.features.append(deepcopy(method))
+        for attr in attr_set_parent:
+            _class.features.append(deepcopy(attr))
+
+    for child in s.graph[start_class]:
+        legacy_expand(s, child)
+
+
+def run(expand, s):
+    tracemalloc.start()
+    start = time.perf_counter()
+    expand(s)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def expand_and_type(s):
+    s.build_tables()
+    s.type_classes()
+
+
+def main(depth=50, methods=200, max_depth=3000):
+    legacy_time, legacy_peak = run(legacy_expand, semantic_for(chain(depth, methods)))
+    table_time, table_peak = run(Semantic.expand_inherited_classes, semantic_for(chain(depth, methods)))
+
+    print("%d classes x %d methods" % (depth, methods))
+    print("deepcopy expansion:  %8.1f ms  peak %8.1f KiB" % (legacy_time * 1e3, legacy_peak / 1024))
+    print("feature tables:      %8.1f ms  peak %8.1f KiB" % (table_time * 1e3, table_peak / 1024))
+    print("reduction:           %7.0fx time  %6.0fx memory" % (legacy_time / table_time, legacy_peak / table_peak))
+
+    methods = min(methods, 10)
+    print("\nfeature tables and typing pass, %d methods per class" % methods)
+    chain_depth = 250
+    while chain_depth <= max_depth:
+        s = Semantic(ast=chain(chain_depth, methods))
+        elapsed, peak = run(expand_and_type, s)
+        print("depth %5d:  %8.1f ms  peak %8.1f KiB  %6.2f KiB/class"
+              % (chain_depth, elapsed * 1e3, peak / 1024, peak / 1024 / chain_depth))
+        chain_depth *= 2
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,62 @@
+# Parser scaling benchmark.
+#
+# Generates a class with N features and a method whose block has N statements,
+# parses them at a few sizes and checks that doubling N roughly doubles the
+# parse time (list rules must stay linear).
+#
+#   python benchmarks/parse_scaling.py [max_features] [max_statements]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lexer
+import parser
+
+# Doubling the input may cost at most this much more than 2x before we call it
+# superlinear. Quadratic rules give ~4x.
+MAX_GROWTH = 2.8
+
+
+def many_features(n):
+    body = ''.join('    a%d : Int <- %d;\n' % (i, i) for i in range(n))
+    return 'class Main {\n%s    main() : Object { 0 };\n};\n' % body
+
+
+def many_statements(n):
+    body = ''.join('        x <- x + %d;\n' % i for i in range(n))
+    return 'class Main {\n    x : Int;\n    main() : Object {\n    {\n%s    }\n    };\n};\n' % body
+
+
+def parse_seconds(source):
+    p = parser.get_parser()
+    start = time.perf_counter()
+    p.parse(source, lexer=lexer.get_lexer())
+    return time.perf_counter() - start
+
+
+def check(name, generate, largest):
+    sizes = [largest // 4, largest // 2, largest]
+    times = [parse_seconds(generate(n)) for n in sizes]
+    ok = True
+    for n, t in zip(sizes, times):
+        print('%-12s n=%-7d %.3fs  (%.2f us/element)' % (name, n, t, t / n * 1e6))
+    for before, after in zip(times, times[1:]):
+        if after / before > MAX_GROWTH:
+            ok = False
+    print('%-12s %s' % (name, 'linear' if ok else 'SUPERLINEAR'))
+    return ok
+
+
+def main(max_features=10000, max_statements=100000):
+    parse_seconds(many_features(10))  # builds the tables outside the timing
+    ok = check('features', many_features, max_features)
+    ok = check('statements', many_statements, max_statements) and ok
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    sys.exit(main(*args))
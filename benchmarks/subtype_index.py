@@ -0,0 +1,77 @@
+# Subtype query benchmark.
+#
+# Builds 5k-class hierarchies (one deep chain, one wide and shallow tree) and
+# times random is_child queries with the recursive graph walk against the
+# preorder interval index, plus join queries on the index.
+#
+#   python benchmarks/subtype_index.py [classes] [queries]
+
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic import Semantic
+from utils.hierarchy import ClassHierarchy
+
+
+def deep(n):
+    graph = defaultdict(set)
+    parent = "Object"
+    for i in range(n):
+        graph[parent].add("C%d" % i)
+        parent = "C%d" % i
+    return graph
+
+
+def wide(n, fanout=16):
+    graph = defaultdict(set)
+    names = ["Object"]
+    for i in range(n):
+        name = "C%d" % i
+        graph[names[i // fanout]].add(name)
+        names.append(name)
+    return graph
+
+
+def semantic_for(graph):
+    s = Semantic.__new__(Semantic)
+    s.graph = graph
+    s.hierarchy = None
+    return s
+
+
+def time_queries(fn, pairs):
+    start = time.perf_counter()
+    for child, parent in pairs:
+        fn(child, parent)
+    return time.perf_counter() - start
+
+
+def main(classes=5000, queries=2000):
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), classes * 4))
+    rng = random.Random(0)
+    names = ["Object"] + ["C%d" % i for i in range(classes)]
+
+    for label, graph in (("deep", deep(classes)), ("wide", wide(classes))):
+        pairs = [(rng.choice(names), rng.choice(names)) for _ in range(queries)]
+        s = semantic_for(graph)
+
+        walk = time_queries(s.is_child, pairs)
+
+        start = time.perf_counter()
+        s.hierarchy = ClassHierarchy(graph)
+        build = time.perf_counter() - start
+        index = time_queries(s.is_child, pairs)
+        join = time_queries(s.hierarchy.join, pairs)
+
+        print("%-5s walk %8.2f us/query   index %6.3f us/query (build %.1f ms)   join %6.2f us/query   %.0fx"
+              % (label, walk / queries * 1e6, index / queries * 1e6, build * 1e3,
+                 join / queries * 1e6, walk / index))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
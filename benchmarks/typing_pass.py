@@ -0,0 +1,106 @@
+# Typing pass benchmark.
+#
+# Generates a program with many classes and expression-heavy methods, runs the
+# semantic phase up to the typing pass, then times typing every class and
+# counts how many times a node handler ran. With workers > 1 it also times
+# Semantic.type_classes as configured and with the process pool forced (at
+# most one worker per usable CPU), and checks that the merged types are the
+# same as the serial ones.
+#
+#   python benchmarks/typing_pass.py [classes] [methods_per_class] [workers]
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import semantic
+from utils.ast_helper import iter_nodes
+
+
+def program(classes, methods):
+    out = []
+    for c in range(classes):
+        parent = 'C%d' % (c - 1) if c else 'IO'
+        out.append('class C%d inherits %s {' % (c, parent))
+        out.append('    x%d : Int;' % c)
+        out.append('    y%d : Int;' % c)
+        for m in range(methods):
+            out.append('    m%d_%d(a : Int, b : Int) : Int {' % (c, m))
+            out.append('        let z : Int <- a + y%d * 2, w : Int <- z - b in' % c)
+            out.append('            if z < w then (z + x%d) * (w - a) / 2 else w * (z + b) - (a + 1) fi' % c)
+            out.append('    };')
+        out.append('};')
+    out.append('class Main { main() : Object { 0 }; };')
+    return '\n'.join(out) + '\n'
+
+
+class CountingDict(dict):
+    # Counts handler lookups, one per node visit
+    calls = 0
+
+    def get(self, key, default=None):
+        CountingDict.calls += 1
+        return dict.get(self, key, default)
+
+
+def prepared(source):
+    with tempfile.NamedTemporaryFile('w', suffix='.cl', delete=False) as f:
+        f.write(source)
+    try:
+        s = semantic.Semantic(f.name, use_cache=False)
+    finally:
+        os.remove(f.name)
+    s.map_and_create_initial_graph()
+    s.check_for_wrong_inheritance()
+    s.check_for_undefined_classes()
+    s.expand_inherited_classes()
+    s.create_method_map()
+    s.check_for_inheritance_cycles()
+    s.build_hierarchy()
+    return s
+
+
+def types(s):
+    return [node.return_type for cl in s.classes_map.values() for node in iter_nodes(cl)]
+
+
+def main(classes=200, methods=20, workers=1):
+    source = program(classes, methods)
+
+    s = prepared(source)
+    start = time.perf_counter()
+    for cl in s.classes_map.values():
+        s.type_class(cl)
+    elapsed = time.perf_counter() - start
+
+    s = prepared(source)
+    s.infer_handlers = CountingDict(s.infer_handlers)
+    CountingDict.calls = 0
+    for cl in s.classes_map.values():
+        s.type_class(cl)
+
+    print('%d classes x %d methods' % (classes, methods))
+    print('typing pass:  %.3fs, %d node visits' % (elapsed, CountingDict.calls))
+
+    if workers > 1:
+        serial = types(s)
+        pool = min(workers, semantic.usable_cpus())
+        # As configured (serial below PARALLEL_MIN_CLASSES), then with the pool forced
+        for label, min_classes in (('threshold', semantic.PARALLEL_MIN_CLASSES), ('forced', 0)):
+            semantic.PARALLEL_MIN_CLASSES, saved = min_classes, semantic.PARALLEL_MIN_CLASSES
+            s = prepared(source)
+            start = time.perf_counter()
+            s.type_classes(workers)
+            parallel = time.perf_counter() - start
+            semantic.PARALLEL_MIN_CLASSES = saved
+            used = pool > 1 and classes >= min_classes
+            print('%-9s    %.3fs (%.2fx), %s, same types: %s'
+                  % (label, parallel, elapsed / parallel,
+                     '%d workers' % pool if used else 'serial', types(s) == serial))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,165 @@
+# Visitor dispatch micro-benchmark.
+#
+# Walks the expressions of a generated, expression-heavy program twice: once
+# dispatching with an isinstance chain in the order traverse_expression used
+# to test node classes, once through utils.visitor.dispatch_table. Both walks
+# do the same work per node, so the difference is the dispatch cost. Also
+# reports the throughput of the real typing pass.
+#
+#   python benchmarks/visitor_dispatch.py [statements]
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import semantic
+from utils.ast_helper import type_fields as T
+from utils.visitor import dispatch_table
+
+
+def program(statements):
+    lines = []
+    for i in range(statements):
+        if i % 3 == 0:
+            lines.append('x <- (x + y) * (y - x) / (x + y * 2);')
+        elif i % 3 == 1:
+            lines.append('if x < y then y <- y + x * 3 else x <- x - y fi;')
+        else:
+            lines.append('while x < y loop { x <- x + 1; y <- y - 1; } pool;')
+    body = '\n'.join('        ' + line for line in lines)
+    return ('class Main {\n    x : Int;\n    y : Int;\n'
+            '    main() : Object {\n    {\n%s\n    }\n    };\n};\n' % body)
+
+
+def children(node):
+    for value in node:
+        if isinstance(value, tuple):
+            for item in value:
+                yield item
+        elif value is not None and not isinstance(value, str):
+            yield value
+
+
+class ChainWalker:
+    # Same test order as the old traverse_expression, then the remaining classes
+    order = ['BinOp', 'While', 'Block', 'Assign', 'If', 'Case', 'New', 'Ident',
+             'Self', 'FunctCall', 'MethodCall', 'Let', 'UnOp']
+
+    def __init__(self):
+        self.count = 0
+
+    def walk(self, node):
+        self.count += 1
+        if isinstance(node, T['BinOp']):
+            self.walk(node.left); self.walk(node.right)
+        elif isinstance(node, T['While']):
+            self.walk(node.condition); self.walk(node.action)
+        elif isinstance(node, T['Block']):
+            for element in node.elements:
+                self.walk(element)
+        elif isinstance(node, T['Assign']):
+            self.walk(node.expr); self.walk(node.ident)
+        elif isinstance(node, T['If']):
+            self.walk(node.condition); self.walk(node.true); self.walk(node.false)
+        elif isinstance(node, T['Case']):
+            self.generic(node)
+        elif isinstance(node, T['New']):
+            pass
+        elif isinstance(node, T['Ident']):
+            pass
+        elif isinstance(node, T['Self']):
+            pass
+        elif isinstance(node, T['FunctCall']):
+            self.generic(node)
+        elif isinstance(node, T['MethodCall']):
+            self.generic(node)
+        elif isinstance(node, T['Let']):
+            self.generic(node)
+        elif isinstance(node, T['UnOp']):
+            self.generic(node)
+
+    def generic(self, node):
+        for child in children(node):
+            self.walk(child)
+
+
+class TableWalker:
+    def __init__(self):
+        self.count = 0
+        self.handlers = dispatch_table(self, 'walk_')
+
+    def walk(self, node):
+        self.count += 1
+        handler = self.handlers.get(node.__class__)
+        if handler is not None:
+            handler(node)
+
+    def walk_BinOp(self, node):
+        self.walk(node.left); self.walk(node.right)
+
+    def walk_While(self, node):
+        self.walk(node.condition); self.walk(node.action)
+
+    def walk_Block(self, node):
+        for element in node.elements:
+            self.walk(element)
+
+    def walk_Assign(self, node):
+        self.walk(node.expr); self.walk(node.ident)
+
+    def walk_If(self, node):
+        self.walk(node.condition); self.walk(node.true); self.walk(node.false)
+
+    def generic(self, node):
+        for child in children(node):
+            self.walk(child)
+
+    walk_Case = walk_FunctCall = walk_MethodCall = walk_Let = walk_UnOp = generic
+
+
+def rate(walker, body, repeat=5):
+    best = None
+    for _ in range(repeat):
+        walker.count = 0
+        start = time.perf_counter()
+        walker.walk(body)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return walker.count, walker.count / best
+
+
+def main(statements=20000):
+    with tempfile.NamedTemporaryFile('w', suffix='.cl', delete=False) as f:
+        f.write(program(statements))
+    try:
+        s = semantic.Semantic(f.name, use_cache=False)
+    finally:
+        os.remove(f.name)
+
+    main_class = s.ast[-1]
+    body = main_class.features[-1].expr
+
+    nodes, chain = rate(ChainWalker(), body)
+    _, table = rate(TableWalker(), body)
+    print('nodes per walk:     %d' % nodes)
+    print('isinstance chain:   %10.0f nodes/s' % chain)
+    print('dispatch table:     %10.0f nodes/s  (%.2fx)' % (table, table / chain))
+
+    s.map_and_create_initial_graph()
+    s.check_for_wrong_inheritance()
+    s.check_for_undefined_classes()
+    s.expand_inherited_classes()
+    s.create_method_map()
+    s.check_for_inheritance_cycles()
+    s.build_hierarchy()
+    start = time.perf_counter()
+    s.type_class(main_class)
+    elapsed = time.perf_counter() - start
+    print('typing pass:        %10.0f nodes/s' % (nodes / elapsed))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -1,6 +1,14 @@
+import parser
+import optimizer
+import reachability
 from semantic import main
 from utils.errors import Error, Warning
-from utils.ast_helper import type_fields
+from utils.ast_helper import type_fields, iter_nodes, Returnable
+from utils.visitor import dispatch_table, walk
+from utils.symbol_table import SymbolTable
+from utils.emitter import Emitter
+from utils import bril
+from utils import pass_timer
 
 Method = type_fields['Method']
 Type = type_fields['Types']
@@ -9,6 +17,7 @@ Formal = type_fields['Formal']
 Attr = type_fields['Attr']
 BinOp = type_fields['BinOp']
 While = type_fields['While']
+Assign = type_fields['Assign']
 
 inbuilt_functions = {
     "input_integer" :   "",
@@ -20,29 +29,160 @@ inbuilt_functions = {
     "type_name" :   ""
 }
 
-def io_out_string(arg):
-    pass
+# IO methods that lower to a Bril instruction instead of a call
+print_functions = ("output_int",)
+
+# Cool types that have a Bril value type; other values are not supported yet
+bril_types = {
+    "Int": "int",
+    "Bool": "bool",
+}
+
+arithmetic_ops = {
+    "+": "add",
+    "-": "sub",
+    "*": "mul",
+    "/": "div",
+}
+
+comparison_ops = {
+    "<": "lt",
+    "<=": "le",
+    "=": "eq",
+}
+
+def assigning_nodes(root):
+    '''ids of the nodes under root, root included, with an Assign somewhere under them'''
+    assigning = set()
+    # reversed preorder sees every node after all of its descendants
+    for node in reversed(list(iter_nodes(root))):
+        if isinstance(node, Assign):
+            assigning.add(id(node))
+            continue
+        stack = list(node)
+        while stack:
+            value = stack.pop()
+            if isinstance(value, Returnable):
+                if id(value) in assigning:
+                    assigning.add(id(node))
+                    break
+            elif isinstance(value, (tuple, list)):
+                stack.extend(value)
+    return assigning
+
+class Temps:
+    """
+    Names for expression temporaries, '_t<n>' so they never clash with a Cool
+    identifier. A temporary is released once its single use has been emitted
+    and handed out again for the next value of the same type, but only inside
+    the same basic block: end_block() drops the free list at every label.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.types = {}
+        self.free = {}
+
+    def new(self, type):
+        free = self.free.get(type)
+        if free:
+            return free.pop()
+        name = '_t%d' % self.count
+        self.count += 1
+        self.types[name] = type
+        return name
+
+    def release(self, name):
+        type = self.types.get(name)
+        if type is not None:
+            self.free.setdefault(type, []).append(name)
+
+    def end_block(self):
+        self.free.clear()
 
 class CodeGen:
 
-    def __init__(self, sourcefile):
-        self.ast = main(sourcefile)
+    def __init__(self, sourcefile=None, use_cache=True, ast=None, out=None, format='text'):
+        # ast is an already checked program (see driver.py), otherwise sourcefile is checked here
+        self.ast = ast if ast is not None else main(sourcefile, use_cache)
         # print('RESULTADO DA FASE SEMANTICA:')
         # print(self.ast)
         # print('-----------------------------')
-        self.out_file = sourcefile + ".bril"
-
-    def write(self, s, n=0):
-        line = ""
-        line += "\t"*n
-        line += s 
-        line += "\n"
-        with open(self.out_file, "a") as f:
-            f.write(line)
-        
-    
+        # 'text' for Bril's text form, 'json' for canonical Bril JSON
+        self.format = format
+        extension = ".json" if format == 'json' else ".bril"
+        self.out_file = sourcefile + extension if sourcefile is not None else None
+        # The program is built as data (see utils/bril.py) and serialized by emit()
+        self.program = bril.Program()
+        self.function = None
+        self.main_class = None
+        # Main's methods by name, the only ones a call can resolve to
+        self.methods = {}
+        # Lines are buffered until save(), or streamed to out if given (see utils/emitter.py)
+        self.emitter = Emitter(out)
+        # node class -> lower_* handler (see utils/visitor.py)
+        self.lower_handlers = dispatch_table(self, 'lower_')
+
+    def emit(self):
+        if self.format == 'json':
+            self.emitter.line(self.program.dumps())
+        else:
+            for line in self.program.to_text():
+                self.emitter.line(line)
+
+    def save(self):
+        self.emitter.save(self.out_file)
+
+    ## ----------------------> funcoes
+
+    def begin_function(self, name, formals=(), type=None):
+        args = []
+        for formal in formals:
+            args.append((formal.ident.name, self.value_type(formal.type, formal.ident.name)))
+        self.function = self.program.function(name, args, type)
+        self.temps = Temps()
+        self.label_count = 0
+        # Cool name -> Bril variable, Let can shadow so names are made unique per function
+        self.scopes = SymbolTable()
+        self.scopes.push()
+        self.variables = set()
+        for name, _ in args:
+            self.scopes.define(name, name)
+            self.variables.add(name)
+        # operands of the lowered subexpressions, see lower()
+        self.values = []
+
+    def value_type(self, cool_type, what):
+        bril_type = bril_types.get(cool_type)
+        if bril_type is None:
+            raise Error("Tipo %s de %s nao suportado na geracao de codigo" % (cool_type, what))
+        return bril_type
+
+    def new_variable(self, name):
+        unique, n = name, 0
+        while unique in self.variables:
+            n += 1
+            unique = '%s.%d' % (name, n)
+        self.variables.add(unique)
+        self.scopes.define(name, unique)
+        return unique
+
+    def new_label(self, prefix):
+        self.label_count += 1
+        return '%s.%d' % (prefix, self.label_count)
+
+    def label(self, name):
+        self.function.label(name)
+        self.temps.end_block()
+
+    def lower(self, expression):
+        """Emit the instructions of expression, returns the variable holding its value or None"""
+        # see snapshot()
+        self.assigning = assigning_nodes(expression)
+        walk(expression, self.lower_handlers)
+        return self.values.pop()
+
     def check_for_Main_class(self):
-        self.write("@main {", 0)
         main_class = ()
         for cl in self.ast:
             if cl.name == "Main":
@@ -57,131 +197,289 @@ class CodeGen:
             raise Error("Não existe classe main. O programa é inválido")   
 
         for feature in main_class.features:
-            
-            # Checa declaração de variaveis globais
-            if isinstance(feature, type_fields['Attr']):
-
-                # print("FEATURE ----------------")
-                # print(feature)
-                # print("END FEATURE ----------------\n")
-
-                data_type = ""
-                value = ""
-                findedAttr = False
-                if feature.type == "Int":
-                    data_type = "int"
-                    value  = "0"
-                    findedAttr = True
-
-                if feature.type == "Bool":
-                    data_type = "bool"
-                    value  = "False"
-                    findedAttr = True
-                
-                # O  tipo string não é suportado em birl
-                elif feature.type == "String":
-                    print('STRING: Não eh reconhecido.')
-                
-                if findedAttr:
-                    # Se acha, grava no arquivo.
-                    s = feature.ident.name + ": " + data_type + " = const " + value
-                    self.write(s, 1)
-                
-
-    def add_basic_operation(self,stmt):
-        # print("add_binary_operation STMT ----------------")
-        # print(stmt.operator)
-        # print("END MAIN----------------\n")
-        # Qual variavel colocar?         
-        if stmt.operator == '+':
-            print('add ' + str(stmt.left.name)+ " " + str(stmt.right.name))
-        if stmt.operator == '-':
-            print('sub ' + str(stmt.left.name)+ " " + str(stmt.right.name))
-        if stmt.operator == '/':
-            print('div ' + str(stmt.left.name)+ " " + str(stmt.right.name))
-        if stmt.operator == '*':
-            print('mul ' + str(stmt.left.name)+ " " + str(stmt.right.name))        
-    
-    def add_left_value(self,stmt):
-        pass
-
-    def add_statement(self,stmt):
-        print("add_statement stmt ----------------")
-        print(stmt)
-        print("END ----------------\n")
-        if isinstance(stmt,type_fields['Assign']):
-            self.add_statement(stmt.expr)
-            self.add_left_value(stmt.ident)
-        if isinstance(stmt,type_fields['BinOp']):
-            self.add_basic_operation(stmt)
-        if isinstance(stmt, type_fields['FunctCall']):
-            # Se é uma função, precisamos reconhecer seus parametros.
-            self.add_params(stmt.params) 
-        if isinstance(stmt, int):
-            # caso seja inteiro.
-            print()
-
-    def add_params(self, params):
-        for i in params:
-            # print('FunctionCall add_params i')
-            # print(i)
-            # print('Call add_statement again >>')
-            self.add_statement(i)
-
-    def add_function(self, method, cl):
-        """ Adding Function """
-        print("method ----------------")
-        print(method)
-        print("END ----------------\n")
-        for i in method.expr:
-            for innerElement in i:
-                self.add_statement(innerElement)
+            if isinstance(feature, Method):
+                self.methods[feature.ident.name] = feature
 
-    def analyzer_functions(self):
-        """ Adding all functions other than Main """
-        # print("self.main_class.features ----------------")
-        # print(self.main_class.features)
-        # print("END ----------------\n")
+        self.begin_function("main")
 
-        for i in self.main_class.features:
-            # Busca todas as funções que não são padrão e nem a própria main.
-            if isinstance(i, type_fields['Method']):
-                if i.ident.name not in inbuilt_functions and i.ident.name != "main":
-                    self.add_function(i, "main")
+        # Os atributos de Main sao variaveis de @main, inicializadas na ordem de declaracao
+        for feature in main_class.features:
+            if isinstance(feature, Attr):
+                data_type = bril_types.get(feature.type)
+                # O tipo string não é suportado em bril
+                if data_type is None:
+                    continue
+                if feature.expr is None:
+                    self.function.const(feature.ident.name, data_type, 0 if data_type == "int" else False)
+                else:
+                    value = self.lower(feature.expr)
+                    self.function.value("id", feature.ident.name, data_type, [value])
+                    self.temps.release(value)
+                self.scopes.define(feature.ident.name, feature.ident.name)
+                self.variables.add(feature.ident.name)
 
     def check_for_main_method(self):
-        main_block = ()
+        main_block = self.methods.get('main')
         # Percorre todas as features da classe main, em busca do método main.
-        for feature in self.main_class.features:
-            if isinstance(feature, type_fields['Method']) and feature.ident.name == 'main':
-                main_block = feature
-                break
-
-        if main_block ==():
+        if main_block is None:
             raise Error("Não existe metodo main. O programa é inválido") 
 
-        # Checar o metodo main para encontrar funções chamadas, aqui pode ter mais de um elemento
-        for elements in main_block.expr:
-            for execute_method in elements:
-                # print("main functions ----------------")
-                # print(execute_method)
-                # print("END ----------------\n")
-                if isinstance(execute_method, type_fields['FunctCall']):
-                    finalParam = ""
-                    for param in execute_method.params:
-                        finalParam += str(param) + " "
-                    s = "response : int = " + execute_method.ident.name + " " + finalParam
-                    self.write(s, 1)
-                    
-                    self.add_statement(execute_method)
-        
-def codegen(sourcefile):
-    codeGen = CodeGen(sourcefile)
-    codeGen.check_for_Main_class()   
-    codeGen.check_for_main_method()
-    codeGen.analyzer_functions()
+        # O valor de main e descartado, @main nao tem tipo de retorno
+        self.temps.release(self.lower(main_block.expr))
+
+    def analyzer_functions(self):
+        """ Adding all functions other than Main """
+        for method in self.main_class.features:
+            # Busca todas as funções que não são padrão e nem a própria main.
+            if isinstance(method, Method) and method.ident.name not in inbuilt_functions and method.ident.name != "main":
+                self.add_function(method)
+
+    def add_function(self, method):
+        return_type = bril_types.get(method.type)
+        self.begin_function(method.ident.name, method.formals, return_type)
+        value = self.lower(method.expr)
+        if return_type is not None:
+            self.function.effect("ret", [value])
+        self.temps.release(value)
+
+    ## ----------------------> expressoes
+    #
+    # lower_* handlers run under utils.visitor.walk: a handler yields each child
+    # expression to have it lowered, then pops the child's operand from
+    # self.values. Every handler pushes exactly one operand, None when the
+    # expression has no Bril value (While, calls to untyped methods).
+
+    def snapshot(self, expression, value):
+        '''
+        An operand is read when the operation runs, after the operands to its right were
+        evaluated. When one of those assigns, a variable operand is copied to a temporary
+        first, so it keeps the value it had when it was evaluated: with x = 1,
+        x + (x <- 5) is 6. Temporaries are never assigned twice and are kept as they are.
+        '''
+        if value is None or value in self.temps.types:
+            return value
+        dest = self.temps.new(self.value_type(expression.return_type, value))
+        self.function.value("id", dest, self.temps.types[dest], [value])
+        return dest
+
+    def lower_Int(self, value):
+        dest = self.temps.new("int")
+        self.function.const(dest, "int", value)
+        self.values.append(dest)
+
+    def lower_Bool(self, value):
+        dest = self.temps.new("bool")
+        self.function.const(dest, "bool", value)
+        self.values.append(dest)
+
+    def lower_String(self, value):
+        raise Error("String nao suportada na geracao de codigo: %r" % value)
+
+    def lower_Ident(self, expression):
+        name = self.scopes.lookup(expression.name)
+        if name is None:
+            raise Error("Variavel %s nao disponivel em @%s (atributos so existem em main)" % (expression.name, self.function.name))
+        self.values.append(name)
+
+    def lower_Assign(self, expression):
+        yield expression.expr
+        value = self.values.pop()
+        dest = self.scopes.lookup(expression.ident.name)
+        if dest is None:
+            raise Error("Variavel %s nao disponivel em @%s (atributos so existem em main)" % (expression.ident.name, self.function.name))
+        self.function.value("id", dest, self.value_type(expression.ident.return_type, expression.ident.name), [value])
+        self.temps.release(value)
+        self.values.append(dest)
+
+    def lower_BinOp(self, expression):
+        yield expression.left
+        if id(expression.right) in self.assigning:
+            self.values[-1] = self.snapshot(expression.left, self.values[-1])
+        yield expression.right
+        right = self.values.pop()
+        left = self.values.pop()
+        operator = expression.operator
+        if operator in arithmetic_ops:
+            self.temps.release(left)
+            self.temps.release(right)
+            dest = self.temps.new("int")
+            self.function.value(arithmetic_ops[operator], dest, "int", [left, right])
+        elif operator == "=" and (expression.left.__class__ is bool or getattr(expression.left, 'return_type', None) == "Bool"):
+            dest = self.bool_equal(left, right)
+        else:
+            self.temps.release(left)
+            self.temps.release(right)
+            dest = self.temps.new("bool")
+            self.function.value(comparison_ops[operator], dest, "bool", [left, right])
+        self.values.append(dest)
+
+    def bool_equal(self, left, right):
+        # Bril's eq only takes ints: a = b is (a and b) or (not a and not b)
+        both = self.temps.new("bool")
+        self.function.value("and", both, "bool", [left, right])
+        not_left = self.temps.new("bool")
+        self.function.value("not", not_left, "bool", [left])
+        not_right = self.temps.new("bool")
+        self.function.value("not", not_right, "bool", [right])
+        for name in (left, right, not_left, not_right):
+            self.temps.release(name)
+        neither = self.temps.new("bool")
+        self.function.value("and", neither, "bool", [not_left, not_right])
+        self.temps.release(both)
+        self.temps.release(neither)
+        dest = self.temps.new("bool")
+        self.function.value("or", dest, "bool", [both, neither])
+        return dest
+
+    def lower_UnOp(self, expression):
+        yield expression.right
+        value = self.values.pop()
+        operator = expression.operator.lower()
+        if operator == "~":
+            zero = self.temps.new("int")
+            self.function.const(zero, "int", 0)
+            self.temps.release(zero)
+            self.temps.release(value)
+            dest = self.temps.new("int")
+            self.function.value("sub", dest, "int", [zero, value])
+        elif operator == "not":
+            self.temps.release(value)
+            dest = self.temps.new("bool")
+            self.function.value("not", dest, "bool", [value])
+        else:
+            raise Error("Operador %s nao suportado na geracao de codigo" % expression.operator)
+        self.values.append(dest)
+
+    def lower_Block(self, expression):
+        value = None
+        for element in expression.elements:
+            self.temps.release(value)
+            yield element
+            value = self.values.pop()
+        self.values.append(value)
+
+    def lower_If(self, expression):
+        yield expression.condition
+        condition = self.values.pop()
+        self.temps.release(condition)
+        result_type = bril_types.get(expression.return_type)
+        # The result lives across the branches, so it is a temporary nobody else gets
+        dest = self.temps.new(result_type) if result_type is not None else None
+        then_label, else_label, end_label = self.new_label("then"), self.new_label("else"), self.new_label("endif")
+        self.function.effect("br", [condition], labels=[then_label, else_label])
+        for label, branch in ((then_label, expression.true), (else_label, expression.false)):
+            self.label(label)
+            yield branch
+            value = self.values.pop()
+            if dest is None:
+                pass
+            elif value is not None:
+                self.function.value("id", dest, result_type, [value])
+            else:
+                # an arm without a value (a loop, a call with no result) still defines dest
+                self.function.const(dest, result_type, 0 if result_type == "int" else False)
+            self.temps.release(value)
+            self.function.effect("jmp", labels=[end_label])
+        self.label(end_label)
+        self.values.append(dest)
+
+    def lower_While(self, expression):
+        cond_label, body_label, end_label = self.new_label("while"), self.new_label("loop"), self.new_label("pool")
+        self.label(cond_label)
+        yield expression.condition
+        condition = self.values.pop()
+        self.temps.release(condition)
+        self.function.effect("br", [condition], labels=[body_label, end_label])
+        self.label(body_label)
+        yield expression.action
+        self.temps.release(self.values.pop())
+        self.function.effect("jmp", labels=[cond_label])
+        self.label(end_label)
+        self.values.append(None)
+
+    def lower_Let(self, expression):
+        # Each binding is visible in the initializers after it and in the body
+        self.scopes.push()
+        for assignment in expression.assignments:
+            data_type = self.value_type(assignment.type, assignment.ident.name)
+            if assignment.expr is None:
+                value = None
+            else:
+                yield assignment.expr
+                value = self.values.pop()
+            name = self.new_variable(assignment.ident.name)
+            if value is None:
+                self.function.const(name, data_type, 0 if data_type == "int" else False)
+            else:
+                self.function.value("id", name, data_type, [value])
+                self.temps.release(value)
+        yield expression.expr
+        self.scopes.pop()
+
+    def lower_FunctCall(self, expression):
+        # arguments up to the last one that assigns are read after it runs
+        last_assigning = max((i for i, param in enumerate(expression.params) if id(param) in self.assigning), default=-1)
+        for i, param in enumerate(expression.params):
+            yield param
+            if i < last_assigning:
+                self.values[-1] = self.snapshot(param, self.values[-1])
+        args = self.values[len(self.values) - len(expression.params):]
+        del self.values[len(self.values) - len(expression.params):]
+        for arg in args:
+            self.temps.release(arg)
+
+        name = expression.ident.name
+        if name in print_functions:
+            self.function.effect("print", args)
+            self.values.append(None)
+            return
+        method = self.methods.get(name)
+        if method is None:
+            raise Error("Metodo %s nao suportado na geracao de codigo" % name)
+        return_type = bril_types.get(method.type)
+        if return_type is None:
+            self.function.effect("call", args, funcs=[name])
+            self.values.append(None)
+        else:
+            dest = self.temps.new(return_type)
+            self.function.value("call", dest, return_type, args, funcs=[name])
+            self.values.append(dest)
+
+    def lower_MethodCall(self, expression):
+        # Only calls on self have a Bril counterpart, there are no objects in core Bril
+        if not isinstance(expression.object, type_fields['Self']) or expression.targettype is not None:
+            raise Error("Despacho em objetos nao suportado na geracao de codigo: %s" % expression.method.ident.name)
+        yield expression.method
+
+    def unsupported(self, expression):
+        raise Error("Expressao %s nao suportada na geracao de codigo" % type(expression).__name__)
+
+    lower_Case = lower_New = lower_Self = unsupported
+
+def codegen(sourcefile, use_cache=True, out=None, format='text', opt_level=0):
+    codeGen = CodeGen(sourcefile, use_cache, out=out, format=format)
+    if opt_level >= 1:
+        with pass_timer.measure('codegen', 'prune_unreachable', codeGen.ast) as record:
+            codeGen.ast, counters = reachability.prune(codeGen.ast)
+            if record is not None:
+                record.update(counters)
+    for step in (codeGen.check_for_Main_class, codeGen.check_for_main_method, codeGen.analyzer_functions):
+        with pass_timer.measure('codegen', step.__name__, codeGen.ast):
+            step()
+    optimizer.optimize(codeGen.program, opt_level)
+    codeGen.emit()
+    if out is None:
+        codeGen.save()
     
 if __name__ == "__main__":
     import sys
     sourcefile = sys.argv[1]
-    codegen(sourcefile)
\ No newline at end of file
+    log = pass_timer.from_argv(sys.argv[2:])
+    # --stdout streams the program instead of writing <sourcefile>.bril
+    # --json writes canonical Bril JSON (<sourcefile>.json) instead of the text form
+    # -O1 to -O3 run the optimizer on the lowered program (see optimizer.py)
+    levels = [int(arg[2:]) for arg in sys.argv[2:] if arg.startswith('-O')]
+    codegen(sourcefile, '--no-cache' not in sys.argv[2:], sys.stdout if '--stdout' in sys.argv[2:] else None,
+            'json' if '--json' in sys.argv[2:] else 'text', levels[-1] if levels else 0)
+    pass_timer.finish(log)
+    parser.report_cache_stats()
\ No newline at end of file
@@ -0,0 +1,133 @@
+import parser
+import optimizer
+import reachability
+from semantic import Semantic
+from codegen import CodeGen
+from utils.errors import Error
+from utils import pass_timer
+
+# Compile driver.
+#
+# Runs the phases over one source text, in order, handing the same AST from
+# one to the next: the source is parsed once, semantic analysis types that
+# tree in place and codegen emits from the typed tree. Any prefix of STAGES
+# can be run, so a tool that only needs the typed AST stops after 'semantic'.
+# Diagnostics raised by a phase (utils.errors.Error, syntax errors) end the
+# compilation and are returned in the result instead of being printed.
+
+STAGES = ('parse', 'semantic', 'codegen')
+
+
+class CompileResult:
+    def __init__(self, source):
+        self.source = source
+        # stages that completed, in order
+        self.stages = []
+        # the parsed program, without the builtin classes
+        self.ast = None
+        # the Semantic object; semantic.ast is the typed program, builtins included
+        self.semantic = None
+        # the generated utils.bril.Program; program.to_json() is canonical Bril JSON
+        self.program = None
+        # the same program in Bril's text form
+        self.bril = None
+        self.errors = []
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def __repr__(self):
+        return 'CompileResult(stages=%r, errors=%r)' % (self.stages, self.errors)
+
+
+class Compiler:
+    """
+    Compiles Cool sources. One Compiler keeps one parser and its AST cache
+    across compilations; workers is handed to the typing pass and opt_level
+    picks the optimizer passes run on the lowered Bril (see optimizer.py).
+    From -O1 on, methods and classes unreachable from Main.main are dropped
+    before codegen (see reachability.py).
+    """
+
+    def __init__(self, use_cache=True, workers=None, opt_level=0):
+        self.parser = parser.CoolParser(parser.ast_cache() if use_cache else None)
+        self.workers = workers
+        self.opt_level = opt_level
+
+    def compile(self, source, stages=STAGES):
+        stages = tuple(stages)
+        if stages != STAGES[:len(stages)]:
+            raise ValueError('stages must be a prefix of %r, got %r' % (STAGES, stages))
+
+        result = CompileResult(source)
+        try:
+            for stage in stages:
+                getattr(self, 'run_' + stage)(result)
+                result.stages.append(stage)
+        except Error as e:
+            result.errors.append(str(e))
+        return result
+
+    def compile_file(self, path, stages=STAGES):
+        with open(path, 'r') as f:
+            return self.compile(f.read(), stages)
+
+    def run_parse(self, result):
+        with pass_timer.measure('parse', 'parse') as record:
+            result.ast = self.parser.parse_string(result.source)
+            if record is not None:
+                record['output'] = result.ast
+        if result.ast is None:
+            raise Error('Erro de sintaxe')
+
+    def run_semantic(self, result):
+        s = Semantic(ast=result.ast)
+        result.semantic = s
+        s.build_tables()
+        with pass_timer.measure('semantic', 'type_classes', s.ast):
+            s.type_classes(self.workers)
+
+    def run_codegen(self, result):
+        ast = result.semantic.ast
+        if self.opt_level >= 1:
+            with pass_timer.measure('codegen', 'prune_unreachable', ast) as record:
+                ast, counters = reachability.prune(ast)
+                if record is not None:
+                    record.update(counters)
+        gen = CodeGen(ast=ast)
+        for step in (gen.check_for_Main_class, gen.check_for_main_method, gen.analyzer_functions):
+            with pass_timer.measure('codegen', step.__name__, gen.ast):
+                step()
+        optimizer.optimize(gen.program, self.opt_level)
+        gen.emit()
+        result.program = gen.program
+        result.bril = gen.emitter.getvalue()
+
+
+def compile(source, stages=STAGES, use_cache=True, workers=None, opt_level=0):
+    '''Compile the Cool program in the string source, see Compiler.compile'''
+    return Compiler(use_cache, workers, opt_level).compile(source, stages)
+
+
+if __name__ == '__main__':
+    import sys
+
+    # python driver.py file.cl [--stages=parse,semantic] [-O1|-O2|-O3] [--json] [--no-cache] [--workers=N] [--time-passes ...]
+    args = sys.argv[2:]
+    stages = [arg.split('=', 1)[1].split(',') for arg in args if arg.startswith('--stages=')]
+    workers = [int(arg.split('=', 1)[1]) for arg in args if arg.startswith('--workers=')]
+    levels = [int(arg[2:]) for arg in args if arg.startswith('-O')]
+    log = pass_timer.from_argv(args)
+    result = Compiler('--no-cache' not in args, workers[-1] if workers else None, levels[-1] if levels else 0).compile_file(
+        sys.argv[1], stages[-1] if stages else STAGES)
+    pass_timer.finish(log)
+
+    for error in result.errors:
+        print('Error: %s' % error, file=sys.stderr)
+    if result.program is not None:
+        if '--json' in args:
+            print(result.program.dumps())
+        else:
+            sys.stdout.write(result.bril)
+    sys.exit(0 if result.ok else 1)
@@ -2,9 +2,8 @@
 # PLY (Python Lex-Yacc): https://github.com/dabeaz/ply 
 # =========================
 
-from distutils.debug import DEBUG
+import sys
 import ply.lex as lex
-from ply.yacc import yacc
 
 # --- Tokenizer
 
@@ -103,7 +102,7 @@ def t_newline(t):
 
 
 def t_error(t):
-    print("Illegal character '{}'" % t.value[0])
+    print("Illegal character '{}'".format(t.value[0]), file=sys.stderr)
     t.lexer.skip(1)
 
 t_ignore  = ' \t' + ' ' + '\n'
@@ -132,31 +131,33 @@ t_INT_COMP = r'\~'
 
 # L E X E R ========================= 
 
-lexer = lex.lex()
+# The master regex is only compiled the first time a lexer is requested, so
+# importing this module (e.g. just for `tokens`) stays cheap.
 
-# data = '''
-# class Main inherits IO {
-#    main(): SELF_TYPE {
-# 	out_string("Hello, World.")
-#    };
-# };
-# '''
+_lexer = None
 
-# lexer.input(data)
+def get_lexer():
+    global _lexer
+    if _lexer is None:
+        _lexer = lex.lex(module=sys.modules[__name__])
+    return _lexer
 
-# # Build the lexer object
-# lex.lex()
+def __getattr__(name):
+    # Keep `lexer.lexer` working for old callers, built on first access
+    if name == 'lexer':
+        return get_lexer()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 ###### PROCESS INPUT ######
 
 
 if __name__ == '__main__':
 
-    import sys
     sourcefile = sys.argv[1]
 
+    lexer = get_lexer()
     with open(sourcefile, 'r') as source:
-        lex.input(source.read())
+        lexer.input(source.read())
 
     # Read tokens
     # Tokenize
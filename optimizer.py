@@ -0,0 +1,758 @@
+from utils import pass_timer
+from utils.call_graph import CallGraph
+from utils.cfg import CFG, IterationLimit, form_blocks, flatten
+from utils.ssa import UNDEFINED, Names, to_ssa, from_ssa
+
+# Optimizations over the Bril program built by codegen (utils.bril.Program),
+# run between lowering and emission. Every pass rewrites function.instrs in
+# place and is timed under the 'optimize' phase of utils.pass_timer; the
+# passes in PROGRAM_PASSES take the whole program instead of a function and
+# return counters that are added to their pass_timer record.
+#
+# From -O1 on codegen only lowers what reachability.py finds reachable from
+# Main.main.
+#
+#   -O0  nothing
+#   -O1  per basic block: local value numbering, with constant folding and
+#        propagation and copy propagation, then trivial dead code elimination
+#   -O2  -O1, inlining of small calls, then over the whole function in SSA
+#        form (utils.ssa): sparse conditional constant propagation, global
+#        value numbering and dead code elimination, and -O1 again on the code
+#        out of SSA
+#   -O3  -O2 with, between value numbering and dce, loop-invariant code motion
+#        and strength reduction of multiplications by induction variables in
+#        the natural loops (the lowered While nodes), and value numbering again
+#
+# The fixed-point loops are bounded so that compile time stays bounded on huge
+# methods: an analysis that has not converged within its bound gives up and
+# leaves the function as it was, and functions longer than MAX_SSA_INSTRS are
+# not put in SSA form at all.
+
+MAX_ROUNDS = 50             # dominator, dce and loop-invariance rounds
+MAX_STEPS_PER_INSTR = 20    # sccp worklist steps, per instruction of the function
+MAX_SSA_INSTRS = 50000
+
+INLINE_SIZE = 25            # largest callee inlined, in instructions
+INLINE_DEPTH = 3            # calls inlined from code that was itself inlined, nested
+INLINE_RECURSION = 1        # copies of a recursive function inlined into one call chain
+INLINE_MAX_CALLER = 2000    # no more inlining into a function past this size
+
+COMMUTATIVE = ('add', 'mul', 'eq', 'and', 'or')
+
+def _wrap(value):
+    # Bril ints are 64-bit two's complement
+    return (value + 2 ** 63) % 2 ** 64 - 2 ** 63
+
+def _div(a, b):
+    # Bril division truncates towards zero
+    return -(abs(a) // abs(b)) if (a < 0) != (b < 0) else a // b
+
+FOLD = {
+    'add': lambda a, b: _wrap(a + b),
+    'sub': lambda a, b: _wrap(a - b),
+    'mul': lambda a, b: _wrap(a * b),
+    'div': lambda a, b: _wrap(_div(a, b)),
+    'eq': lambda a, b: a == b,
+    'lt': lambda a, b: a < b,
+    'gt': lambda a, b: a > b,
+    'le': lambda a, b: a <= b,
+    'ge': lambda a, b: a >= b,
+    'and': lambda a, b: a and b,
+    'or': lambda a, b: a or b,
+    'not': lambda a: not a,
+}
+
+# Instructions with a dest that must run even when the dest is never read
+SIDE_EFFECTS = ('call',)
+
+def instr_count(program):
+    return sum(1 for function in program.functions for instr in function.instrs if 'op' in instr)
+
+
+## ----------------------> local value numbering
+
+def lvn_block(block):
+    '''
+    Number the values computed in block. An instruction that recomputes a value
+    a variable still holds becomes an id of that variable, one whose operands are
+    all known constants becomes a const, and every argument is replaced by the
+    oldest variable still holding its value (copy propagation).
+    '''
+    table = {}      # value -> number
+    var2num = {}    # variable -> number of the value it holds
+    holders = []    # number -> variables holding it, oldest first
+    consts = {}     # number -> constant value
+
+    def new_number(var):
+        holders.append([var])
+        return len(holders) - 1
+
+    def number_of(var):
+        num = var2num.get(var)
+        if num is None:
+            # defined outside the block
+            num = var2num[var] = new_number(var)
+        return num
+
+    for instr in block:
+        if 'op' not in instr:
+            continue
+        nums = None
+        args = instr.get('args')
+        if args:
+            nums = [number_of(arg) for arg in args]
+            instr['args'] = [holders[num][0] for num in nums]
+
+        dest = instr.get('dest')
+        if dest is None:
+            continue
+
+        op = instr['op']
+        num = None
+        if op == 'id':
+            num = nums[0]
+            if num in consts:
+                _make_const(instr, consts[num])
+        elif op in SIDE_EFFECTS or (op != 'const' and op not in FOLD):
+            pass
+        else:
+            if op != 'const' and all(n in consts for n in nums) and not (op == 'div' and consts[nums[1]] == 0):
+                _make_const(instr, FOLD[op](*[consts[n] for n in nums]))
+                op = 'const'
+            if op == 'const':
+                value = ('const', instr['type'], instr['value'])
+            else:
+                key = sorted(nums) if op in COMMUTATIVE else nums
+                value = (op,) + tuple(key)
+            num = table.get(value)
+            if num is not None and holders[num]:
+                if num in consts:
+                    _make_const(instr, consts[num])
+                else:
+                    _make_id(instr, holders[num][0])
+            elif num is None:
+                num = table[value] = new_number(dest)
+                holders[num] = []
+                if op == 'const':
+                    consts[num] = instr['value']
+
+        # dest no longer holds what it held before
+        old = var2num.get(dest)
+        if old is not None:
+            holders[old].remove(dest)
+        if num is None:
+            num = new_number(dest)
+        else:
+            holders[num].append(dest)
+        var2num[dest] = num
+
+def _make_const(instr, value):
+    dest, type = instr['dest'], instr['type']
+    instr.clear()
+    instr.update(op='const', dest=dest, type=type, value=value)
+
+def _make_id(instr, var):
+    dest, type = instr['dest'], instr['type']
+    instr.clear()
+    instr.update(op='id', dest=dest, type=type, args=[var])
+
+def lvn(function):
+    for block in form_blocks(function.instrs):
+        lvn_block(block)
+
+
+## ----------------------> dead code elimination
+
+def dce(function):
+    '''
+    Delete instructions whose dest is never read anywhere in the function, and
+    definitions overwritten in the same block before any read; to a fixed point.
+    In SSA form, a dest read only by dead instructions is dead too: liveness
+    is marked from the effects back through their arguments first, so that
+    phis only feeding each other around a loop are deleted as well.
+    '''
+    if function.ssa:
+        defs = {instr['dest']: instr for instr in function.instrs if 'dest' in instr}
+        live = set()
+        work = [instr for instr in function.instrs
+                if 'op' in instr and ('dest' not in instr or instr['op'] in SIDE_EFFECTS)]
+        while work:
+            for arg in work.pop().get('args', ()):
+                if arg not in live and arg in defs:
+                    live.add(arg)
+                    work.append(defs[arg])
+        function.instrs = [instr for instr in function.instrs
+                           if 'dest' not in instr or instr['dest'] in live or instr['op'] in SIDE_EFFECTS]
+
+    changed = True
+    rounds = 0
+    while changed and rounds < MAX_ROUNDS:
+        rounds += 1
+        used = {arg for instr in function.instrs for arg in instr.get('args', ())}
+        instrs = [instr for instr in function.instrs
+                  if 'dest' not in instr or instr['dest'] in used or instr['op'] in SIDE_EFFECTS]
+        changed = len(instrs) != len(function.instrs)
+
+        blocks = form_blocks(instrs)
+        for block in blocks:
+            dead = set()
+            unread = {}     # variable -> index of its last definition, while not read yet
+            for i, instr in enumerate(block):
+                for arg in instr.get('args', ()):
+                    unread.pop(arg, None)
+                dest = instr.get('dest')
+                if dest is not None:
+                    if dest in unread and block[unread[dest]]['op'] not in SIDE_EFFECTS:
+                        dead.add(unread[dest])
+                    unread[dest] = i
+            if dead:
+                block[:] = [instr for i, instr in enumerate(block) if i not in dead]
+                changed = True
+        function.instrs = flatten(blocks)
+
+
+## ----------------------> SSA form
+
+def into_ssa(function):
+    if len(function.instrs) > MAX_SSA_INSTRS:
+        return
+    try:
+        function.instrs = to_ssa(function.instrs, function.args, MAX_ROUNDS)
+    except IterationLimit:
+        return
+    function.ssa = True
+
+def out_of_ssa(function):
+    if function.ssa:
+        function.instrs = from_ssa(function.instrs)
+        function.ssa = False
+
+
+## ----------------------> sparse conditional constant propagation
+
+BOTTOM = object()   # not a constant; a variable missing from the lattice is not known yet
+
+def sccp(function):
+    '''
+    Wegman and Zadeck's sparse conditional constant propagation, over SSA form.
+    Variables start unknown and only blocks reached over an edge found
+    executable are evaluated, so a branch on a constant condition leaves the
+    other side, and everything only it defines, unknown. Constant variables
+    become consts, branches on constants become jmps and the blocks never
+    reached are removed.
+    '''
+    if not function.ssa:
+        return
+    cfg = CFG(function.instrs)
+    uses = {}       # variable -> (block, instruction) reading it
+    for name in cfg.order:
+        for instr in cfg.blocks[name]:
+            for arg in instr.get('args', ()):
+                uses.setdefault(arg, []).append((name, instr))
+
+    values = {arg: BOTTOM for arg, _ in function.args}
+    executable = set()      # edges (pred, block)
+    reached = set()
+    flow = [(None, cfg.entry)]
+    ssa_work = []
+    budget = MAX_STEPS_PER_INSTR * len(function.instrs)
+
+    def evaluate(name, instr):
+        op = instr.get('op')
+        if op is None:
+            return
+        if op in ('jmp', 'br'):
+            targets = instr['labels']
+            if op == 'br':
+                value = values.get(instr['args'][0])
+                if value is None:
+                    return
+                if value is not BOTTOM:
+                    targets = targets[:1] if value else targets[1:]
+            for target in targets:
+                if (name, target) not in executable:
+                    flow.append((name, target))
+            return
+        dest = instr.get('dest')
+        if dest is None or values.get(dest) is BOTTOM:
+            return
+        if op == 'phi':
+            value = None
+            for arg, pred in zip(instr['args'], instr['labels']):
+                if (pred, name) in executable and arg != UNDEFINED:
+                    incoming = values.get(arg)
+                    if incoming is None:
+                        continue
+                    if value is None:
+                        value = incoming
+                    elif incoming is BOTTOM or incoming != value or type(incoming) != type(value):
+                        value = BOTTOM
+                        break
+        elif op == 'const':
+            value = instr['value']
+        elif op == 'id':
+            value = values.get(instr['args'][0])
+        elif op in FOLD:
+            args = [values.get(arg) for arg in instr['args']]
+            if any(arg is BOTTOM for arg in args):
+                value = BOTTOM
+            elif any(arg is None for arg in args):
+                value = None
+            elif op == 'div' and args[1] == 0:
+                value = BOTTOM
+            else:
+                value = FOLD[op](*args)
+        else:
+            value = BOTTOM
+        if value is not None and value is not values.get(dest) and (
+                dest not in values or value is BOTTOM or value != values[dest]):
+            values[dest] = value
+            ssa_work.append(dest)
+
+    steps = 0
+    while flow or ssa_work:
+        steps += 1
+        if steps > budget:
+            return
+        if flow:
+            pred, name = flow.pop()
+            if (pred, name) in executable:
+                continue
+            if pred is not None:
+                executable.add((pred, name))
+            if name in reached:
+                # only the phis see the new edge
+                for instr in cfg.blocks[name]:
+                    if instr.get('op') == 'phi':
+                        evaluate(name, instr)
+                continue
+            reached.add(name)
+            for instr in cfg.blocks[name]:
+                evaluate(name, instr)
+        else:
+            var = ssa_work.pop()
+            for name, instr in uses.get(var, ()):
+                if name in reached:
+                    evaluate(name, instr)
+
+    for name in cfg.order:
+        if name not in reached:
+            continue
+        block = cfg.blocks[name]
+        for instr in block:
+            dest = instr.get('dest')
+            value = values.get(dest)
+            if dest is not None and value is not None and value is not BOTTOM and instr['op'] != 'const':
+                _make_const(instr, value)
+            elif instr.get('op') == 'phi':
+                live = [(arg, pred) for arg, pred in zip(instr['args'], instr['labels']) if (pred, name) in executable]
+                instr['args'] = [arg for arg, _ in live]
+                instr['labels'] = [pred for _, pred in live]
+        last = block[-1]
+        if last['op'] == 'br' and values.get(last['args'][0]) not in (None, BOTTOM):
+            target = last['labels'][0 if values[last['args'][0]] else 1]
+            last.clear()
+            last.update(op='jmp', args=[], labels=[target])
+    cfg.order = [name for name in cfg.order if name in reached]
+    cfg.blocks = {name: cfg.blocks[name] for name in cfg.order}
+    cfg.edges()
+    function.instrs = cfg.instrs(compact=False)
+
+
+## ----------------------> global value numbering
+
+def gvn(function):
+    '''
+    Dominator-based value numbering over SSA form. Walking the dominator tree
+    with a table scoped like the symbol table (undo log), an instruction that
+    recomputes a value available from a dominating block is removed and its
+    dest replaced by the variable already holding it; ids are propagated,
+    constants folded, and a phi whose arguments are all the same value, or
+    that repeats another phi of its block, is replaced too. A phi with some
+    UNDEFINED arguments is only replaced by its one other value when that is
+    defined in a dominating block: anything else would read it on a path
+    that never defined it.
+    '''
+    if not function.ssa:
+        return
+    cfg = CFG(function.instrs)
+    try:
+        idom = cfg.dominators(MAX_ROUNDS)
+    except IterationLimit:
+        return
+    tree = cfg.dominator_tree(idom)
+
+    replace = {}    # variable -> variable holding the same value
+    consts = {}     # variable -> constant value
+    table = {}      # value -> variable holding it
+    defined = {arg for arg, _ in function.args}    # variables defined in the dominating blocks
+    undo = []       # values and variables added, None marking where each block starts
+
+    def find(var):
+        while var in replace:
+            var = replace[var]
+        return var
+
+    work = [(cfg.entry, True)]
+    while work:
+        name, entering = work.pop()
+        if not entering:
+            value = undo.pop()
+            while value is not None:
+                if isinstance(value, str):
+                    defined.discard(value)
+                else:
+                    del table[value]
+                value = undo.pop()
+            continue
+        undo.append(None)
+
+        block = cfg.blocks[name]
+        kept = []
+        for instr in block:
+            op = instr.get('op')
+            if 'args' in instr and op != 'phi':
+                instr['args'] = [find(arg) for arg in instr['args']]
+            dest = instr.get('dest')
+            if dest is None or op in SIDE_EFFECTS:
+                kept.append(instr)
+                continue
+
+            if op == 'id':
+                replace[dest] = instr['args'][0]
+                continue
+            if op == 'phi':
+                args = [find(arg) for arg in instr['args'] if arg != UNDEFINED]
+                if args and all(arg == args[0] for arg in args) and args[0] != dest and (
+                        len(args) == len(instr['args']) or args[0] in defined):
+                    replace[dest] = args[0]
+                    continue
+                value = ('phi', name) + tuple(zip(instr['labels'], [find(arg) for arg in instr['args']]))
+            elif op in FOLD and all(arg in consts for arg in instr['args']) \
+                    and not (op == 'div' and consts[instr['args'][1]] == 0):
+                _make_const(instr, FOLD[op](*[consts[arg] for arg in instr['args']]))
+                value = ('const', instr['type'], instr['value'])
+            elif op == 'const':
+                value = ('const', instr['type'], instr['value'])
+            elif op in FOLD:
+                args = sorted(instr['args']) if op in COMMUTATIVE else instr['args']
+                value = (op,) + tuple(args)
+            else:
+                kept.append(instr)
+                continue
+
+            if value in table:
+                replace[dest] = table[value]
+                continue
+            table[value] = dest
+            undo.append(value)
+            if instr['op'] == 'const':
+                consts[dest] = instr['value']
+            kept.append(instr)
+        for instr in kept:
+            if 'dest' in instr:
+                defined.add(instr['dest'])
+                undo.append(instr['dest'])
+        block[:] = kept
+
+        work.append((name, False))
+        for child in reversed(tree[name]):
+            work.append((child, True))
+
+    # uses in blocks the walk saw before the definitions they now read
+    for name in cfg.order:
+        for instr in cfg.blocks[name]:
+            if 'args' in instr:
+                instr['args'] = [find(arg) if arg != UNDEFINED else arg for arg in instr['args']]
+    function.instrs = cfg.instrs(compact=False)
+
+
+## ----------------------> loops
+
+def _preheader(cfg, header, body):
+    '''
+    The block the loop is entered from: header's only predecessor outside the
+    loop when it jumps straight to header, else a new block on that edge. None
+    when the loop can be entered from more than one block.
+    '''
+    outside = [pred for pred in cfg.preds[header] if pred not in body]
+    if len(outside) != 1:
+        return None
+    pred = outside[0]
+    if cfg.succs[pred] == [header]:
+        return pred
+    preheader = cfg.add_block(pred, [{'op': 'jmp', 'args': [], 'labels': [header]}])
+    last = cfg.blocks[pred][-1]
+    last['labels'] = [preheader if label == header else label for label in last['labels']]
+    for instr in cfg.blocks[header]:
+        if instr.get('op') == 'phi':
+            instr['labels'] = [preheader if label == pred else label for label in instr['labels']]
+    cfg.edges()
+    return preheader
+
+def _loops(cfg):
+    '''(header, body, preheader) of the natural loops of cfg, inner loops first'''
+    loops = cfg.natural_loops(cfg.dominators(MAX_ROUNDS))
+    blocks = len(cfg.order)
+    for header, body in loops:
+        _preheader(cfg, header, body)
+    if len(cfg.order) != blocks:
+        # the new preheaders belong to the loops around theirs
+        loops = cfg.natural_loops(cfg.dominators(MAX_ROUNDS))
+    return [(header, body, _preheader(cfg, header, body)) for header, body in loops]
+
+def _hoist(cfg, preheader, instrs):
+    cfg.blocks[preheader][-1:-1] = instrs
+
+def licm(function):
+    '''
+    Loop-invariant code motion, over SSA form. A pure instruction in a loop
+    whose arguments are all defined outside it, or by instructions found
+    invariant already, moves to the loop's preheader; inner loops go first, so
+    what leaves one can then leave the loop around it. Only divisions by a
+    constant other than zero move, as the loop may not have run them at all.
+    '''
+    if not function.ssa:
+        return
+    cfg = CFG(function.instrs)
+    try:
+        loops = _loops(cfg)
+    except IterationLimit:
+        return
+
+    where = {}      # variable -> block defining it
+    consts = {}
+    for name in cfg.order:
+        for instr in cfg.blocks[name]:
+            if 'dest' in instr:
+                where[instr['dest']] = name
+                if instr['op'] == 'const':
+                    consts[instr['dest']] = instr['value']
+
+    for header, body, preheader in loops:
+        if preheader is None:
+            continue
+        invariant = []
+        marked = set()
+        changed = True
+        rounds = 0
+        while changed and rounds < MAX_ROUNDS:
+            changed = False
+            rounds += 1
+            for name in cfg.order:
+                if name not in body:
+                    continue
+                for instr in cfg.blocks[name]:
+                    op = instr.get('op')
+                    if 'dest' not in instr or instr['dest'] in marked:
+                        continue
+                    if op != 'const' and op != 'id' and op not in FOLD:
+                        continue
+                    if op == 'div' and consts.get(instr['args'][1], 0) == 0:
+                        continue
+                    if all(where.get(arg) not in body or arg in marked for arg in instr.get('args', ())):
+                        marked.add(instr['dest'])
+                        invariant.append(instr)
+                        changed = True
+        if not invariant:
+            continue
+        for name in body:
+            block = cfg.blocks[name]
+            block[:] = [instr for instr in block if instr.get('dest') not in marked]
+        _hoist(cfg, preheader, invariant)
+        for instr in invariant:
+            where[instr['dest']] = preheader
+    function.instrs = cfg.instrs(compact=False)
+
+def strength_reduce(function):
+    '''
+    Strength reduction over SSA form. A basic induction variable is a phi of
+    a loop header taking i0 on entry and i + step around the loop, step being
+    loop invariant. A multiplication of one by an invariant k in the loop then
+    becomes a new induction variable, i0 * k on entry and j + step * k around
+    the loop, computed next to i + step: an add per iteration instead of a mul.
+    '''
+    if not function.ssa:
+        return
+    cfg = CFG(function.instrs)
+    try:
+        loops = _loops(cfg)
+    except IterationLimit:
+        return
+
+    names = Names([instr['dest'] for instr in function.instrs if 'dest' in instr] + [arg for arg, _ in function.args])
+    defs = {}       # variable -> (block, instruction)
+    for name in cfg.order:
+        for instr in cfg.blocks[name]:
+            if 'dest' in instr:
+                defs[instr['dest']] = (name, instr)
+
+    for header, body, preheader in loops:
+        if preheader is None:
+            continue
+
+        def invariant(var):
+            return var in defs and defs[var][0] not in body or var not in defs and var != UNDEFINED
+
+        latches = [pred for pred in cfg.preds[header] if pred in body]
+        ivs = {}    # basic induction variable -> (i0, step, instruction computing i + step)
+        for phi in cfg.blocks[header]:
+            if phi.get('op') != 'phi':
+                continue
+            incoming = dict(zip(phi['labels'], phi['args']))
+            nexts = {incoming.get(latch) for latch in latches}
+            if len(nexts) != 1 or not invariant(incoming.get(preheader, UNDEFINED)):
+                continue
+            following = nexts.pop()
+            if following not in defs or defs[following][1]['op'] != 'add':
+                continue
+            args = defs[following][1]['args']
+            if args.count(phi['dest']) != 1 or defs[following][0] not in body:
+                continue
+            step = args[1] if args[0] == phi['dest'] else args[0]
+            if invariant(step):
+                ivs[phi['dest']] = (incoming[preheader], step, defs[following])
+
+        reduced = {}    # (induction variable, k) -> the new induction variable
+        for name in cfg.order:
+            if name not in body:
+                continue
+            for instr in cfg.blocks[name]:
+                if instr.get('op') != 'mul':
+                    continue
+                a, b = instr['args']
+                iv, k = (a, b) if a in ivs and invariant(b) else (b, a)
+                if iv not in ivs or not invariant(k):
+                    continue
+                if (iv, k) not in reduced:
+                    reduced[iv, k] = _reduce(cfg, names, header, preheader, latches, ivs[iv], k, instr['type'])
+                _make_id(instr, reduced[iv, k])
+    function.instrs = cfg.instrs(compact=False)
+
+def _reduce(cfg, names, header, preheader, latches, iv, k, type):
+    i0, step, (block, increment) = iv
+    j, j0, j_next, j_step = (names.fresh('sr') for _ in range(4))
+    _hoist(cfg, preheader, [
+        {'op': 'mul', 'dest': j0, 'type': type, 'args': [i0, k]},
+        {'op': 'mul', 'dest': j_step, 'type': type, 'args': [step, k]},
+    ])
+    instrs = cfg.blocks[block]
+    at = next(n for n, instr in enumerate(instrs) if instr is increment)
+    instrs.insert(at + 1, {'op': 'add', 'dest': j_next, 'type': type, 'args': [j, j_step]})
+    cfg.blocks[header].insert(1, {'op': 'phi', 'dest': j, 'type': type,
+                                  'args': [j0] + [j_next] * len(latches), 'labels': [preheader] + latches})
+    return j
+
+
+## ----------------------> inlining
+
+def inline(program):
+    '''
+    Replace calls to small functions by a renamed copy of their body: the
+    arguments are copied into the parameters and every ret becomes a copy
+    into the call's dest and a jump past the copy. Functions are visited
+    callees first, so a callee has had its own calls inlined before its size
+    is weighed. Every call resolves to a single function in this backend, so
+    every call is a candidate. The call graph is updated as calls are inlined
+    and functions left without callers, @main aside, are removed. Returns the
+    call sites inlined and the growth in instructions.
+    '''
+    graph = CallGraph(program)
+    functions = {function.name: function for function in program.functions}
+    recursive = graph.recursive()
+    before = instr_count(program)
+
+    inlined = 0
+    for component in graph.sccs():
+        for name in component:
+            inlined += _inline_calls(functions[name], functions, graph, recursive)
+
+    unused = True
+    while unused:
+        unused = [function for function in program.functions
+                  if function.name != 'main' and not graph.callers(function.name)]
+        for function in unused:
+            program.functions.remove(function)
+            del graph.calls[function.name]
+    return {'inlined': inlined, 'growth': instr_count(program) - before}
+
+def _inline_calls(function, functions, graph, recursive):
+    names = Names([instr.get('dest', instr.get('label')) for instr in function.instrs] +
+                  [arg for arg, _ in function.args])
+    instrs = []
+    # (instruction, names of the functions whose inlined bodies it comes from)
+    work = [(instr, ()) for instr in reversed(function.instrs)]
+    inlined = 0
+    while work:
+        instr, chain = work.pop()
+        callee = functions.get(instr['funcs'][0]) if instr.get('op') == 'call' else None
+        if (callee is None or len(chain) >= INLINE_DEPTH
+                or sum(1 for instr in callee.instrs if 'op' in instr) > INLINE_SIZE
+                or len(instrs) + len(work) > INLINE_MAX_CALLER
+                or callee.name in recursive and chain.count(callee.name) + (callee is function) >= INLINE_RECURSION):
+            instrs.append(instr)
+            continue
+        body = _inline_body(instr, callee, names)
+        graph.remove(function.name, callee.name)
+        for copied in body:
+            if copied.get('op') == 'call':
+                graph.add(function.name, copied['funcs'][0])
+        work.extend((copied, chain + (callee.name,)) for copied in reversed(body))
+        inlined += 1
+    function.instrs = instrs
+    return inlined
+
+def _inline_body(call, callee, names):
+    renamed = {}
+
+    def rename(name):
+        if name not in renamed:
+            renamed[name] = names.fresh('%s.%s' % (callee.name, name))
+        return renamed[name]
+
+    done = names.fresh(callee.name + '.done')
+    body = [{'op': 'id', 'dest': rename(param), 'type': type, 'args': [arg]}
+            for (param, type), arg in zip(callee.args, call['args'])]
+    for instr in callee.instrs:
+        if 'label' in instr:
+            body.append({'label': rename(instr['label'])})
+            continue
+        if instr['op'] == 'ret':
+            if 'dest' in call and instr['args']:
+                body.append({'op': 'id', 'dest': call['dest'], 'type': call['type'], 'args': [rename(instr['args'][0])]})
+            body.append({'op': 'jmp', 'args': [], 'labels': [done]})
+            continue
+        copied = dict(instr)
+        if 'dest' in instr:
+            copied['dest'] = rename(instr['dest'])
+        if 'args' in instr:
+            copied['args'] = [rename(arg) for arg in instr['args']]
+        if 'labels' in instr:
+            copied['labels'] = [rename(label) for label in instr['labels']]
+        body.append(copied)
+    body.append({'label': done})
+    return body
+
+
+## ----------------------> pipeline
+
+PASSES = {
+    0: (),
+    1: (lvn, dce),
+    2: (lvn, dce, inline, into_ssa, sccp, gvn, dce, out_of_ssa, lvn, dce),
+    3: (lvn, dce, inline, into_ssa, sccp, gvn, licm, strength_reduce, gvn, dce, out_of_ssa, lvn, dce),
+}
+
+PROGRAM_PASSES = (inline,)
+
+def optimize(program, level=1):
+    for optimization in PASSES[min(level, max(PASSES))]:
+        with pass_timer.measure('optimize', optimization.__name__, nodes=instr_count(program)) as record:
+            if optimization in PROGRAM_PASSES:
+                counters = optimization(program)
+                if record is not None:
+                    record.update(counters)
+            else:
+                for function in program.functions:
+                    optimization(function)
+    return program
@@ -3,10 +3,18 @@
 #       https://theory.stanford.edu/~aiken/software/cool/cool-manual.pdf
 # =======
 
+import copy
+import hashlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 import ply.yacc as yacc
 # Get the token map from the lexer.  This is required.
 import lexer
 import utils.ast_helper as ast
+from utils.ast_cache import AstCache, DEFAULT_MAX_BYTES
 
 tokens = lexer.tokens
 
@@ -36,23 +44,31 @@ precedence = (
     ('left', 'DOT'),
 )
 
+# List rules are left-recursive and append to one list in place, so a list of
+# N elements is built in O(N) with a constant-depth parser stack. The list is
+# turned into the tuple the AST expects by the rule that consumes it.
+
 def p_program(p):
     """program : classes"""
-    p[0] = p[1]
+    p[0] = tuple(p[1])
 
 def p_classes(p):
     """classes : class
-               | class classes"""
+               | classes class"""
     if len(p) == 2:
-        p[0] = (p[1],)
+        p[0] = [p[1]]
     elif len(p) == 3:
-        p[0] = (p[1],) + p[2]
+        p[1].append(p[2])
+        p[0] = p[1]
     else:
         raise SyntaxError()
 
 def p_class(p):
     """class : CLASS TYPE inheritance BLOCK_INIT features_opt BLOCK_END SEMICOLON"""
     p[0] = ast.type_fields['Types'](name=p[2], inherits=p[3], features=p[5])
+    # Equal class text parses to an equal class, so an edit can be found without a walk
+    text = p.lexer.lexdata[p.lexpos(1):p.lexpos(7) + 1]
+    p[0].digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
 
 
 def p_inheritance(p):
@@ -76,11 +92,12 @@ def p_features_opt(p):
 
 def p_features(p):
     """features : feature
-                | feature features"""
+                | features feature"""
     if len(p) == 2:
         p[0] = [p[1]]
     elif len(p) == 3:
-        p[0] = [p[1]] + p[2]
+        p[1].append(p[2])
+        p[0] = p[1]
     else:
         raise SyntaxError()
 
@@ -96,11 +113,12 @@ def p_feature(p):
 
 def p_attr_defs(p):
     """attr_defs : attr_def
-                 | attr_def COMMA attr_defs"""
+                 | attr_defs COMMA attr_def"""
     if len(p) == 2:
-        p[0] = (p[1],)
+        p[0] = [p[1]]
     elif len(p) == 4:
-        p[0] = (p[1],) + p[3]
+        p[1].append(p[3])
+        p[0] = p[1]
     else:
         raise SyntaxError()
 
@@ -123,15 +141,16 @@ def p_formals_opt(p):
     if p.slice[1].type == 'empty':
         p[0] = tuple()
     else:
-        p[0] = p[1]
+        p[0] = tuple(p[1])
 
 def p_formals(p):
     """formals : formal
-               | formal COMMA formals"""
+               | formals COMMA formal"""
     if len(p) == 2:
-        p[0] = (p[1],)
+        p[0] = [p[1]]
     elif len(p) == 4:
-        p[0] = (p[1],) + p[3]
+        p[1].append(p[3])
+        p[0] = p[1]
     else:
         raise SyntaxError()
 
@@ -145,39 +164,42 @@ def p_params_opt(p):
     if p.slice[1].type == 'empty':
         p[0] = tuple()
     else:
-        p[0] = p[1]
+        p[0] = tuple(p[1])
 
 def p_params(p):
     """params : expr
-              | expr COMMA params"""
+              | params COMMA expr"""
     if len(p) == 2:
-        p[0] = (p[1],)
+        p[0] = [p[1]]
     elif len(p) == 4:
-        p[0] = (p[1],) + p[3]
+        p[1].append(p[3])
+        p[0] = p[1]
     else:
         raise SyntaxError()
 
 def p_block(p):
     """block : blockelements"""
-    p[0] = ast.type_fields['Block'](p[1])
+    p[0] = ast.type_fields['Block'](tuple(p[1]))
 
 def p_blockelements(p):
     """blockelements : expr SEMICOLON
-                     | expr SEMICOLON blockelements"""
+                     | blockelements expr SEMICOLON"""
     if len(p) == 3:
-        p[0] = (p[1],)
+        p[0] = [p[1]]
     elif len(p) == 4:
-        p[0] = (p[1],) + p[3]
+        p[1].append(p[2])
+        p[0] = p[1]
     else:
         raise SyntaxError()
 
 def p_typeactions(p):
     """typeactions : typeaction
-                   | typeaction typeactions"""
+                   | typeactions typeaction"""
     if len(p) == 2:
-        p[0] = (p[1],)
+        p[0] = [p[1]]
     elif len(p) == 3:
-        p[0] = (p[1],) + p[2]
+        p[1].append(p[2])
+        p[0] = p[1]
     else:
         raise SyntaxError()
 
@@ -251,9 +273,9 @@ def p_expr(p):
     elif first_token == 'WHILE':
         p[0] = ast.type_fields['While'](condition=p[2], action=p[4])
     elif first_token == 'LET':
-        p[0] = ast.type_fields['Let'](assignments=p[2], expr=p[4])
+        p[0] = ast.type_fields['Let'](assignments=tuple(p[2]), expr=p[4])
     elif first_token == 'CASE':
-        p[0] = ast.type_fields['Case'](expr=p[2], typeactions=p[4])
+        p[0] = ast.type_fields['Case'](expr=p[2], typeactions=tuple(p[4]))
     elif first_token == 'NEW':
         p[0] = ast.type_fields['New'](p[2])
     elif first_token in ['ISVOID', 'INT_COMP', 'NOT']:
@@ -268,15 +290,115 @@ def p_empty(p):
     p[0] = None
 
 def p_error(p):
-    print('Syntax error in input at {!r}'.format(p))
+    print('Syntax error in input at {!r}'.format(p), file=sys.stderr)
 
 # Create parser
-yacc.yacc()
+#
+# The LALR tables are built the first time a parse is requested, never at import.
+# They are pickled under a name derived from a hash of the grammar (tokens,
+# precedence and every rule docstring), so editing a rule changes the file name
+# and a stale table can never be loaded. No parser.out debug file is written.
+
+TABLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__')
+
+_parser = None
+
+def grammar_hash():
+    rules = sorted((f for name, f in globals().items() if name.startswith('p_') and callable(f)),
+                   key=lambda f: f.__code__.co_firstlineno)
+    parts = [repr(precedence), ' '.join(tokens)] + [f.__doc__ or '' for f in rules]
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+def get_parser():
+    global _parser
+    if _parser is None:
+        os.makedirs(TABLES_DIR, exist_ok=True)
+        picklefile = os.path.join(TABLES_DIR, 'parsetab-%s.pickle' % grammar_hash())
+        _parser = yacc.yacc(module=sys.modules[__name__], debug=False, optimize=True,
+                            picklefile=picklefile)
+    return _parser
+
+# AST cache
+#
+# Opt-in: set COOL_AST_CACHE to a directory to reuse parsed ASTs across runs
+# (COOL_AST_CACHE_MB caps its size, 64 MB by default). Entries are keyed by the
+# source text, the grammar hash and AST_VERSION, which must be bumped whenever
+# the node classes in utils/ast_helper.py change shape.
+
+AST_VERSION = 3
+
+_ast_cache = None
+
+def ast_cache():
+    """Return the AST cache configured through the environment, or None"""
+    global _ast_cache
+    directory = os.environ.get('COOL_AST_CACHE')
+    if not directory:
+        return None
+    if _ast_cache is None or _ast_cache.directory != directory:
+        max_mb = os.environ.get('COOL_AST_CACHE_MB')
+        max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+        version = '%s-%d' % (grammar_hash(), AST_VERSION)
+        _ast_cache = AstCache(directory, version, max_bytes)
+    return _ast_cache
+
+def report_cache_stats():
+    if _ast_cache is not None:
+        print('ast cache: %(hits)d hits, %(misses)d misses, %(evictions)d evictions, %(skipped)d skipped' % _ast_cache.stats(),
+              file=sys.stderr)
+
+class CoolParser:
+    """
+    A parser with its own lexer and parser state, so several compilations can
+    run in the same process without sharing line numbers or parse stacks.
+    The LALR tables and the lexer regexes are shared, they are read-only.
+    """
+
+    def __init__(self, cache=None):
+        self.lexer = lexer.get_lexer().clone()
+        self.parser = copy.copy(get_parser())
+        self.cache = cache
+
+    def parse_string(self, text):
+        if self.cache is not None:
+            t = self.cache.get(text)
+            if t is not None:
+                return t
+
+        self.lexer.lineno = 1
+        t = self.parser.parse(text, lexer=self.lexer)
 
-def get_ast(sourcefile):
-	with open(sourcefile, 'r') as source:
-		t = yacc.parse(source.read())
-	return t
+        if self.cache is not None and t is not None:
+            self.cache.put(text, t)
+        return t
+
+    def parse_file(self, path):
+        with open(path, 'r') as source:
+            return self.parse_string(source.read())
+
+    def parse_many(self, paths, workers=None):
+        """Parse every file in paths, returning the ASTs in the same order.
+        With workers > 1 the files are spread across a process pool."""
+        paths = list(paths)
+        if not workers or workers <= 1 or len(paths) <= 1:
+            return [self.parse_file(path) for path in paths]
+
+        chunksize = max(1, len(paths) // (workers * 4))
+        parse = partial(_parse_file_in_worker, self.cache is not None)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(parse, paths, chunksize=chunksize))
+
+# One parser per worker process, built on its first file
+_worker_parser = None
+
+def _parse_file_in_worker(use_cache, path):
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = CoolParser(ast_cache() if use_cache else None)
+    return _worker_parser.parse_file(path)
+
+def get_ast(sourcefile, use_cache=True):
+	return CoolParser(ast_cache() if use_cache else None).parse_file(sourcefile)
 
 if __name__ == '__main__':
 
@@ -285,18 +407,21 @@ if __name__ == '__main__':
 
     # Get file as argument
 
-    if len(sys.argv) != 2:
+    args = [arg for arg in sys.argv[1:] if arg != '--no-cache']
+    use_cache = len(args) == len(sys.argv) - 1
+
+    if len(args) != 1:
         print('You need to specify a cool source file to read from.', file=sys.stderr)
         sys.exit(1)
-    if not sys.argv[1].endswith('.cl'):
+    if not args[0].endswith('.cl'):
         print('Argument needs to be a cool source file ending on ".cl".', file=sys.stderr)
         sys.exit(1)
 
-    sourcefile = sys.argv[1]
+    sourcefile = args[0]
 
     # Read and parse source file
 
-    with open(sourcefile, 'r') as source:
-        t = yacc.parse(source.read())
+    t = get_ast(sourcefile, use_cache)
 
     print (t)
+    report_cache_stats()
@@ -0,0 +1,169 @@
+from utils.ast_helper import type_fields, iter_nodes
+from utils.hierarchy import ClassHierarchy
+
+# Whole-program reachability from Main.main, over the typed AST (semantic.ast).
+#
+# Rapid type analysis: the program starts by creating a Main object and
+# calling its main method. Creating an object of class C runs the
+# initializers of C's attributes, own and inherited. A call f(...) on self
+# inside a method of C, or e.f(...) with e of static type T, can reach the f
+# of every class created so far that is C or T or a subclass of it, so an
+# override is only reached once an object of a class that has it is created;
+# e@T.f(...) reaches exactly T's f. Int, Bool and String objects come from
+# literals and the runtime, they count as created from the start.
+#
+# prune() drops the methods nothing reaches and the classes that are neither
+# created nor an ancestor of one nor own a reached method, before codegen.
+# The checked AST is left as is (it may be cached, see parser.ast_cache):
+# classes that lose features are copies sharing the remaining feature nodes.
+
+Method = type_fields['Method']
+Attr = type_fields['Attr']
+FunctCall = type_fields['FunctCall']
+MethodCall = type_fields['MethodCall']
+New = type_fields['New']
+
+# classes whose objects exist without a `new`
+BASIC_CLASSES = ('Int', 'Bool', 'String')
+
+
+class Reachability:
+    def __init__(self, ast):
+        self.classes = {cl.name: cl for cl in ast}
+        graph = {}
+        for cl in ast:
+            if cl.name != 'Object':
+                graph.setdefault(cl.inherits or 'Object', set()).add(cl.name)
+        self.hierarchy = ClassHierarchy(graph)
+        # class name -> method name -> Method, own methods only
+        self.methods = {cl.name: {feature.ident.name: feature for feature in cl.features if isinstance(feature, Method)}
+                        for cl in ast}
+
+        self.created = set()
+        # class name -> names of its own methods reached
+        self.reached = {name: set() for name in self.classes}
+        # (static type, method name) of every dynamic dispatch seen
+        self.sites = set()
+        self.work = []
+
+    def run(self, main_class='Main', main_method='main'):
+        for name in BASIC_CLASSES:
+            if name in self.classes:
+                self.create(name)
+        self.create(main_class)
+        self.reach(main_class, main_method)
+        while self.work:
+            cl, expression = self.work.pop()
+            self.visit(cl, expression)
+        return self
+
+    def lookup(self, class_name, method_name):
+        '''(class defining it, Method) of method_name in class_name's vtable, or None'''
+        while class_name is not None:
+            method = self.methods.get(class_name, {}).get(method_name)
+            if method is not None:
+                return class_name, method
+            class_name = self.hierarchy.parent.get(class_name)
+        return None
+
+    def reach(self, class_name, method_name):
+        found = self.lookup(class_name, method_name)
+        if found is None:
+            return
+        owner, method = found
+        if method_name not in self.reached[owner]:
+            self.reached[owner].add(method_name)
+            if method.expr is not None:
+                self.work.append((owner, method.expr))
+
+    def dispatch(self, static_type, method_name):
+        if (static_type, method_name) in self.sites:
+            return
+        self.sites.add((static_type, method_name))
+        for name in self.created:
+            if self.hierarchy.is_subtype(name, static_type):
+                self.reach(name, method_name)
+
+    def create(self, class_name):
+        if class_name in self.created or class_name not in self.classes:
+            return
+        self.created.add(class_name)
+        for static_type, method_name in list(self.sites):
+            if self.hierarchy.is_subtype(class_name, static_type):
+                self.reach(class_name, method_name)
+        # the initializers of its attributes, inherited ones in their class
+        name = class_name
+        while name is not None:
+            for feature in self.classes[name].features:
+                if isinstance(feature, Attr) and feature.expr is not None:
+                    self.work.append((name, feature.expr))
+            name = self.hierarchy.parent.get(name)
+
+    def visit(self, cl, expression):
+        '''Calls and news in expression, an expression of a method or attribute of class cl'''
+        qualified = set()
+        for node in iter_nodes(expression):
+            if isinstance(node, MethodCall):
+                qualified.add(id(node.method))
+                if node.targettype is not None:
+                    self.reach(node.targettype, node.method.ident.name)
+                else:
+                    self.dispatch(self.static_type(node.object, cl), node.method.ident.name)
+            elif isinstance(node, FunctCall) and id(node) not in qualified:
+                self.dispatch(cl, node.ident.name)
+            elif isinstance(node, New) and node.type != 'SELF_TYPE':
+                # new SELF_TYPE makes an object of self's class, created already
+                self.create(node.type)
+
+    def static_type(self, expression, cl):
+        if isinstance(expression, bool):
+            return 'Bool'
+        if isinstance(expression, int):
+            return 'Int'
+        if isinstance(expression, str):
+            return 'String'
+        static_type = getattr(expression, 'return_type', None)
+        if static_type == 'SELF_TYPE':
+            return cl
+        # untyped: any class
+        return static_type if static_type in self.classes else self.hierarchy.root
+
+    def live_classes(self):
+        live = set()
+        for name in self.created | {name for name, methods in self.reached.items() if methods}:
+            while name is not None and name not in live:
+                live.add(name)
+                name = self.hierarchy.parent.get(name)
+        return live
+
+
+def prune(ast, main_class='Main', main_method='main'):
+    '''
+    ast without the unreachable classes and methods, and the counters
+    {'classes_dropped': n, 'methods_dropped': n}, counting only methods with a
+    body (not the builtins'). A program without
+    main_class.main_method is returned as is, for codegen to report.
+    '''
+    classes = {cl.name: cl for cl in ast}
+    if main_class not in classes or not any(isinstance(feature, Method) and feature.ident.name == main_method
+                                            for feature in classes[main_class].features):
+        return ast, {'classes_dropped': 0, 'methods_dropped': 0}
+
+    reachability = Reachability(ast).run(main_class, main_method)
+    live = reachability.live_classes()
+    pruned = []
+    methods_dropped = 0
+    for cl in ast:
+        if cl.name not in live:
+            methods_dropped += sum(1 for method in reachability.methods[cl.name].values() if method.expr is not None)
+            continue
+        reached = reachability.reached[cl.name]
+        features = [feature for feature in cl.features if not isinstance(feature, Method) or feature.ident.name in reached]
+        if len(features) != len(cl.features):
+            # builtin methods have no body, only the user's own count as dropped
+            methods_dropped += sum(1 for feature in cl.features
+                                   if isinstance(feature, Method) and feature.ident.name not in reached
+                                   and feature.expr is not None)
+            cl = cl._replace(features=features)
+        pruned.append(cl)
+    return tuple(pruned), {'classes_dropped': len(ast) - len(pruned), 'methods_dropped': methods_dropped}
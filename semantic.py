@@ -1,8 +1,15 @@
+import os
+import sys
 import parser
 from utils.errors import Error, Warning
 from collections import defaultdict
-from utils.ast_helper import type_fields
-from copy import deepcopy
+from concurrent.futures import ProcessPoolExecutor
+from utils.ast_helper import type_fields, iter_nodes, annotate, fingerprint
+from utils.hierarchy import ClassHierarchy
+from utils.feature_table import FeatureTable, method_signature
+from utils.visitor import dispatch_table, walk
+from utils.symbol_table import SymbolTable
+from utils import pass_timer
 
 # Para facilitar a criação dos maps
 Method = type_fields['Method']
@@ -13,16 +20,67 @@ Attr = type_fields['Attr']
 BinOp = type_fields['BinOp']
 While = type_fields['While']
 
+# Classes with no Cool source, created by map_and_create_initial_graph
+BUILTIN_CLASSES = ('Object', 'IO', 'String', 'Int', 'Bool')
+
+# Below this many classes a worker pool costs more than it saves: forking,
+# sending the annotations back and applying them to the parent's AST is
+# close to the price of typing the classes serially.
+PARALLEL_MIN_CLASSES = 2000
+
+def usable_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
 class Semantic:
-        def __init__(self, file):
+        def __init__(self, file=None, use_cache=True, ast=None):
 
             self.classes_map = {}
             self.method_map = {}
+            # class name -> FeatureTable, own and inherited features
+            self.feature_tables = {}
 
-            self.ast = parser.get_ast(file)
+            self.ast = ast if ast is not None else parser.get_ast(file, use_cache)
             # graph with
             self.graph = defaultdict(set)
-
+            # subtype index, built once the graph is known to be a tree
+            self.hierarchy = None
+            # class name -> names of the classes whose FeatureTable typing it consulted
+            self.dependencies = {}
+            self.depends_on = set()
+            # class name -> fingerprint of its AST, filled on demand (see recheck)
+            self.fingerprints = {}
+
+            # node class -> handler, one per pass (see utils/visitor.py)
+            self.infer_handlers = dispatch_table(self, 'infer_')
+            self.check_handlers = dispatch_table(self, 'check_')
+
+        def __getstate__(self):
+            # Handler tables hold bound methods, they are rebuilt on unpickling
+            state = self.__dict__.copy()
+            del state['infer_handlers'], state['check_handlers']
+            return state
+
+        def __setstate__(self, state):
+            self.__dict__.update(state)
+            self.infer_handlers = dispatch_table(self, 'infer_')
+            self.check_handlers = dispatch_table(self, 'check_')
+
+        def fingerprint(self, name):
+            digest = self.fingerprints.get(name)
+            if digest is None:
+                digest = self.fingerprints[name] = class_fingerprint(self.classes_map[name])
+            return digest
+
+        def build_tables(self):
+            '''Every pass up to the typing pass, each one timed by utils.pass_timer'''
+            for step in (self.map_and_create_initial_graph, self.check_for_wrong_inheritance,
+                         self.check_for_undefined_classes, self.expand_inherited_classes,
+                         self.create_method_map, self.check_for_inheritance_cycles, self.build_hierarchy):
+                with pass_timer.measure('semantic', step.__name__, self.ast):
+                    step()
 
         ## ----------------------> PASSO (1)
         def map_and_create_initial_graph(self):
@@ -161,16 +219,20 @@ class Semantic:
                         if tmp in checked_method:
                             raise Error("Metodo já definido")
                         checked_method[tmp] = feature.type
+
+            # Only declared methods: inherited ones resolve through the feature
+            # tables, listing them for every class would be quadratic in depth
             self.method_map = checked_method
 
 
         def check_inheritance_tree(self,initial_class, checked):
-            checked[initial_class] = True
-            if initial_class not in self.graph.keys():
-                return True
-
-            for child in self.graph[initial_class]:
-                self.check_inheritance_tree(child, checked)
+            # explicit stack, inheritance chains can be deeper than the recursion limit
+            stack = [initial_class]
+            while stack:
+                _class = stack.pop()
+                checked[_class] = True
+                if _class in self.graph:
+                    stack.extend(self.graph[_class])
             return True
 
         def check_for_inheritance_cycles(self):
@@ -192,16 +254,28 @@ class Semantic:
                 if not value:
                     raise Error("Herança Cíclica.")
 
-        def infer_return_types(self,cl):
+        def build_hierarchy(self):
+            '''
+            Number the inheritance tree so subtype and join queries are O(1)/O(depth).
+            Must run after check_for_inheritance_cycles, the graph is read-only from here on.
+            '''
+            self.hierarchy = ClassHierarchy(self.graph)
+
+        def type_class(self, cl):
             
             '''
             The Cool type system guarantees at compile time that execution of a program cannot result in runtime
             type errors. Using the type declarations for identifiers supplied by the programmer, the type checker
             infers a type for every expression in the program.
+
+            Inference and checking share one walk: each node is typed by its infer_* handler and
+            validated by its check_* handler as soon as its subtree is done.
             '''
-            variable_scopes  = [dict()]
+            scopes = SymbolTable()
+            scopes.push()
             seen_attribute = set()
             seen_method = set()
+            self.depends_on = {cl.name}
             
             # Checa os atributos para evitar repeticao
             for feature in cl.features:
@@ -212,20 +286,27 @@ class Semantic:
 
                     seen_attribute.add(feature.ident.name)
 
-                    if feature.type == "SELF_TYPE":
-                        variable_scopes[-1][feature.ident.name] = cl.name
-                    else:
-                        variable_scopes[-1][feature.ident.name] = feature.type #[-1] is for latest scope
+            # Own and inherited attributes are in scope too, infer_Ident falls back to
+            # the class's feature table rather than defining every one of them here
 
-            # Checa os metodos para evitar repeticao
             for feature in cl.features:
 
-                if isinstance(feature, Method):
+                if isinstance(feature, Attr):
+                    if feature.expr is None:
+                        continue
+                    self.traverse_expression(feature.expr, scopes, cl)
+                    realtype = cl.name if feature.type == "SELF_TYPE" else feature.type
+                    child_type = self.type_of(feature.expr)
+                    if not self.is_child(child_type, realtype):
+                        raise Error("Tipo inferido %s para o atributo %s diferente do declado %s" % (child_type, feature.ident.name, realtype))
+
+                # Checa os metodos para evitar repeticao
+                elif isinstance(feature, Method):
                     if feature.ident.name in seen_method:
-                        raise Error("Metodo %s ja esta definido." %feature.name)
+                        raise Error("Metodo %s ja esta definido." %feature.ident.name)
 
                     seen_method.add(feature.ident.name)
-                    variable_scopes.append(dict()) #adding new scope
+                    scopes.push() #adding new scope
 
                     seen_formals = set()
 
@@ -233,84 +314,228 @@ class Semantic:
                     for form in feature.formals:
 
                         if form.ident.name in seen_formals:
-                            raise Error("A Variavel %s no metodo %s ja esta definida." %(form.ident.name, feature.name))
-
-                        seen_formals.add(form)
-                        variable_scopes[-1][form.ident.name] = form.type
+                            raise Error("A Variavel %s no metodo %s ja esta definida." %(form.ident.name, feature.ident.name))
+                        if form.type == "SELF_TYPE":
+                            raise Error("%s não pode ter self type" % form.ident.name)
+                        elif form.type not in self.classes_map:
+                            raise Error("%s tipo indefinido" % form.ident.name)
+
+                        seen_formals.add(form.ident.name)
+                        scopes.define(form.ident.name, form.type)
                     
-                    self.traverse_expression(feature.expr, variable_scopes, cl)
-                    del variable_scopes[-1]
-                
-                elif isinstance(feature, Attr):
-                    self.traverse_expression(feature.expr, variable_scopes, cl)
+                    if feature.expr is not None:
+                        self.traverse_expression(feature.expr, scopes, cl)
+                    scopes.pop()
 
+            # Only recorded once the class typed cleanly, see retype_classes
+            self.dependencies[cl.name] = self.depends_on
 
-        def traverse_expression(self, expression, variable_scopes, cl):
 
-            if isinstance(expression, BinOp):
-                self.traverse_expression(expression.left, variable_scopes, cl)
-                self.traverse_expression(expression.right, variable_scopes, cl)
-                if expression.operator in ['<', '>', '==']:
-                    expression.return_type = 'Bool'
-                else:
-                    expression.return_type = 'Int'
-                
-
-            elif isinstance(expression, While):
-                self.traverse_expression(expression.condition, variable_scopes, cl)
-                self.traverse_expression(expression.action, variable_scopes, cl)
-                
-
-            elif isinstance(expression, type_fields['Block']):
-                last_type = None
-                for expr in expression.elements:
-                    self.traverse_expression(expr, variable_scopes, cl)
-                    last_type = getattr(expr, 'return_type', None)
-                expression.return_type = last_type
-                
-
-            elif isinstance(expression, type_fields['Assign']):
-                self.traverse_expression(expression.expr, variable_scopes, cl)
-                self.traverse_expression(expression.ident, variable_scopes, cl)
-                expression.return_type = expression.ident.return_type
-                
-
-            elif isinstance(expression, type_fields['If']):
-                self.traverse_expression(expression.condition, variable_scopes, cl)
-                self.traverse_expression(expression.true, variable_scopes, cl)
-                self.traverse_expression(expression.false, variable_scopes, cl)
-                
-                true_type = self.classes_map[expression.true.return_type]
-                false_tyep = self.classes_map[expression.false.return_type]
-
-            elif isinstance(expression, type_fields['Case']):
-                pass
-
-            elif isinstance(expression, type_fields['New']):
-                if expression.type == 'SELF_TYPE':
-                    expression.return_type = cl.name
-                    return
-
-                expression.return_type = expression.type
-                
-            elif isinstance(expression, Ident):
-                for scope in variable_scopes[::-1]:
-                    if expression.name in scope:
-                        expression.return_type = scope[expression.name]
-                        return
-                        
-                raise Error("Variavel local nao declarada no escopo: " + expression.name + " na classe: " + cl.name)
-
-            elif isinstance(expression, type_fields['Assign']):
-                tmp = (expression.ident.name, cl.name)
-                
-                if  tmp not in self.method_map:
-                    raise Error("Funcao nao definida no escopo: " + expression.ident.name + " na classe: " + cl.name)
+        def type_classes(self, workers=None, classes=None):
+            '''
+            Run type_class over every class. With workers > 1 and at least PARALLEL_MIN_CLASSES
+            classes they are typed across a process pool of at most one worker per usable CPU:
+            after build_hierarchy the tables are read-only, so each worker gets one copy of them
+            up front and is then only sent class names. Workers send back the inferred types
+            alone, which are merged in class order with errors, so the result matches a serial
+            run. classes defaults to every class.
+            '''
+            classes = list(self.classes_map.values() if classes is None else classes)
+            workers = min(workers or 1, usable_cpus())
+            if workers <= 1 or len(classes) < PARALLEL_MIN_CLASSES:
+                for cl in classes:
+                    self.type_class(cl)
+                return
+
+            names = [cl.name for cl in classes]
+            chunksize = max(1, len(names) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_type_worker, initargs=(self,)) as pool:
+                results = list(pool.map(_type_class_in_worker, names, chunksize=chunksize))
+
+            for cl, (types, dependencies, error) in zip(classes, results):
+                annotate(cl, types)
+                if dependencies is not None:
+                    self.dependencies[cl.name] = dependencies
+                # A serial run stops at the first class with an error
+                if error is not None:
+                    raise Error(error)
+
+        def retype_classes(self, previous, workers=None):
+            '''
+            Type this program reusing `previous`, a Semantic that typed an earlier version of it.
+            Unchanged classes are expected to be the very class nodes of previous, already typed
+            (recheck arranges that). A class is typed again when it is a new node or when the
+            interface (see FeatureTable.interface) of a class in its recorded dependencies
+            changed; the others keep their types. Builtin classes have nothing to type and are
+            never typed again. Any change to the inheritance tree types everything again.
+            Returns the names of the classes that were typed.
+            '''
+            if previous.hierarchy is None or self.hierarchy.parent != previous.hierarchy.parent:
+                self.type_classes(workers)
+                return list(self.classes_map)
+
+            edited = {name for name, cl in self.classes_map.items()
+                      if cl is not previous.classes_map[name] and name not in BUILTIN_CLASSES}
+            # Interfaces include inherited features, so one can only change if its class was
+            # edited or its parent's changed: walk the tree top down, comparing just those
+            changed = set()
+            parent = self.hierarchy.parent
+            for name in sorted(self.classes_map, key=self.hierarchy.pre.__getitem__):
+                if name in edited or parent[name] in changed:
+                    if self.feature_tables[name].interface() != previous.feature_tables[name].interface():
+                        changed.add(name)
+
+            dirty = []
+            for name, cl in self.classes_map.items():
+                dependencies = previous.dependencies.get(name)
+                if name in BUILTIN_CLASSES:
+                    self.dependencies[name] = dependencies if dependencies is not None else {name}
+                elif name in edited or dependencies is None or not changed.isdisjoint(dependencies):
+                    dirty.append(cl)
                 else:
-                    if self.method_map[tmp] == 'SELF_TYPE':
-                        pass
-                    else:
-                        expression.return_type = self.method_map[tmp]
+                    self.dependencies[name] = dependencies
+
+            self.type_classes(workers, dirty)
+            return [cl.name for cl in dirty]
+
+        def traverse_expression(self, expression, scopes, cl):
+            # infer_* handlers yield the children they need typed first, check_* run
+            # once a node's subtree is done (see utils/visitor.walk)
+            walk(expression, self.infer_handlers, scopes, cl, after=self.check_handlers)
+
+        def infer_BinOp(self, expression, scopes, cl):
+            yield expression.left
+            yield expression.right
+            if expression.operator in ['<', '<=', '=']:
+                expression.return_type = 'Bool'
+            else:
+                expression.return_type = 'Int'
+
+        def infer_UnOp(self, expression, scopes, cl):
+            yield expression.right
+            if expression.operator == '~':
+                expression.return_type = 'Int'
+            else:
+                # not, isvoid
+                expression.return_type = 'Bool'
+
+        def infer_While(self, expression, scopes, cl):
+            yield expression.condition
+            yield expression.action
+            # a loop evaluates to void, whose static type is Object
+            expression.return_type = 'Object'
+
+        def infer_Block(self, expression, scopes, cl):
+            last_type = None
+            for expr in expression.elements:
+                yield expr
+                last_type = self.type_of(expr)
+            expression.return_type = last_type
+
+        def infer_Assign(self, expression, scopes, cl):
+            yield expression.expr
+            yield expression.ident
+            expression.return_type = expression.ident.return_type
+
+        def infer_If(self, expression, scopes, cl):
+            yield expression.condition
+            yield expression.true
+            yield expression.false
+
+            expression.return_type = self.hierarchy.join(self.type_of(expression.true), self.type_of(expression.false))
+
+        def infer_Case(self, expression, scopes, cl):
+            yield expression.expr
+            branch_types = []
+            for typeaction in expression.typeactions:
+                scopes.push()
+                scopes.define(typeaction.ident.name, typeaction.type)
+                yield typeaction.expr
+                scopes.pop()
+                branch_types.append(self.type_of(typeaction.expr))
+            expression.return_type = self.hierarchy.join_all(branch_types)
+
+        def infer_New(self, expression, scopes, cl):
+            if expression.type == 'SELF_TYPE':
+                expression.return_type = cl.name
+                return
+
+            expression.return_type = expression.type
+
+        def infer_Ident(self, expression, scopes, cl):
+            var_type = scopes.lookup(expression.name)
+            if var_type is not None:
+                expression.return_type = var_type
+                return
+            attr = self.feature_tables[cl.name].lookup_attribute(expression.name)
+            if attr is not None:
+                expression.return_type = cl.name if attr.type == "SELF_TYPE" else attr.type
+                return
+
+            raise Error("Variavel local nao declarada no escopo: " + expression.name + " na classe: " + cl.name)
+
+        def infer_Let(self, expression, scopes, cl):
+            # Each binding is visible in the initializers after it and in the body
+            scopes.push()
+            for assignment in expression.assignments:
+                var_type = cl.name if assignment.type == 'SELF_TYPE' else assignment.type
+                if assignment.expr is not None:
+                    yield assignment.expr
+                    # Checked before the body, like the binding order
+                    if not self.is_child(self.type_of(assignment.expr), var_type):
+                        raise Error("Tipo inferido %s para a variavel %s diferente do declarado %s" % (self.type_of(assignment.expr), assignment.ident.name, var_type))
+                scopes.define(assignment.ident.name, var_type)
+            yield expression.expr
+            scopes.pop()
+            expression.return_type = self.type_of(expression.expr)
+
+        def infer_Self(self, expression, scopes, cl):
+            expression.return_type = cl.name
+
+        def infer_FunctCall(self, expression, scopes, cl):
+            for param in expression.params:
+                yield param
+            method = self.resolve_method(cl.name, expression.ident.name)
+            expression.return_type = cl.name if method.type == 'SELF_TYPE' else method.type
+
+        def infer_MethodCall(self, expression, scopes, cl):
+            yield expression.object
+            object_type = self.type_of(expression.object)
+            call = expression.method
+            for param in call.params:
+                yield param
+
+            method = self.resolve_method(self.dispatch_type(expression), call.ident.name)
+            call.return_type = object_type if method.type == 'SELF_TYPE' else method.type
+            expression.return_type = call.return_type
+
+        def type_of(self, expression):
+            '''inferred type of an expression, literals are plain python values in the ast'''
+            if isinstance(expression, bool):
+                return 'Bool'
+            if isinstance(expression, int):
+                return 'Int'
+            if isinstance(expression, str):
+                return 'String'
+            return getattr(expression, 'return_type', None)
+
+        def dispatch_type(self, expression):
+            '''class whose vtable a MethodCall dispatches through, checking a static @Type'''
+            object_type = self.type_of(expression.object)
+            if expression.targettype is None:
+                return object_type
+            if not self.is_child(object_type, expression.targettype):
+                raise Error("Tipo %s nao estah conforme o tipo do despacho estatico %s" % (object_type, expression.targettype))
+            return expression.targettype
+
+        def resolve_method(self, class_name, method_name):
+            '''one dict probe for the slot and one list index into the class vtable'''
+            table = self.feature_tables.get(class_name)
+            self.depends_on.add(class_name)
+            method = table.lookup_method(method_name) if table is not None else None
+            if method is None:
+                raise Error("Funcao nao definida no escopo: %s na classe: %s" % (method_name, class_name))
+            return method
             
 
         def expand_inherited_classes(self, start_class="Object"):
@@ -321,167 +546,153 @@ class Semantic:
                 3- It is an error to inherit from or redefine Int.
                 4- It is an error to inherit from or redefine String.
                 5- It is an error to inherit from or redefine Bool.
+
+            Builds one FeatureTable per class in a single pass from the root, each
+            parent before its children. Inherited features are shared with the
+            parent table, the class AST itself is left untouched.
             """
 
-            _class = self.classes_map[start_class]
+            stack = [(start_class, None)]
+            while stack:
+                name, parent_table = stack.pop()
+                _class = self.classes_map[name]
+                table = FeatureTable(name, parent_table)
 
-            if _class.inherits:
-                _class_parent = self.classes_map[_class.inherits]
-                attr_set_child = [i for i in _class.features if isinstance(i, Attr)]
-                attr_set_parent = [i for i in _class_parent.features if isinstance(i, Attr)]
-                
-                for attr in attr_set_child:
-                    for p in attr_set_parent:
-                        if attr.name == p.name:
+                for feature in _class.features:
+                    if isinstance(feature, Attr):
+                        if table.inherited_attribute(feature.ident.name):
                             raise Error("É um erro redefinir a classe")
-
-                all_methods_from_child = [i for i in _class.features if isinstance(i, Method)]
-                all_methods_from_parent = [i for i in _class_parent.features if isinstance(i, Method)]
-
-                def header_method_classes(method_set):
-                    all_methods = {}
-                
-                    for method in method_set:
-                        all_methods[method.ident.name] = {}
-                        for formal in method.formals:
-                            all_methods[method.ident.name][formal.ident.name] = formal.type
-                        all_methods[method.ident.name]['return'] = method.type
-                
-                    return all_methods
-
-                methods_child = header_method_classes(all_methods_from_child)
-                methods_parent = header_method_classes(all_methods_from_parent)
-
-                methods_in_child = set()
-
-                for method in all_methods_from_child:
-                    methods_in_child.add(method.ident.name)
-                    if method.ident.name in methods_parent:
-                        parent_signature = methods_parent[method.ident.name]
-                        child_signature = methods_child[method.ident.name]
-                        if parent_signature != child_signature:
+                        table.add_attribute(feature)
+                    elif isinstance(feature, Method):
+                        parent_method = table.inherited_method(feature.ident.name)
+                        if parent_method is not None and method_signature(parent_method) != method_signature(feature):
                             raise Error("Erro de redefinicao")
+                        table.add_method(feature)
 
-                for method in all_methods_from_parent:
-                    if method.ident.name not in methods_in_child:
-                        _class.features.append(deepcopy(method))
-                for attr in attr_set_parent:
-                    _class.features.append(deepcopy(attr))
-
-            all_children = self.graph[start_class]
-            for child in all_children:
-                self.expand_inherited_classes(child)
+                self.feature_tables[name] = table
+                for child in self.graph[name]:
+                    stack.append((child, table))
 
         def is_child(self,child_class, parent_class):
             """check whether child class is a descendent of parent class"""
-            if child_class == parent_class:
-                return True
-            for _class in self.graph[parent_class]:
-                if self.is_child(child_class, _class):
+            if self.hierarchy is not None:
+                return self.hierarchy.is_subtype(child_class, parent_class)
+            stack = [parent_class]
+            while stack:
+                _class = stack.pop()
+                if child_class == _class:
                     return True
+                stack.extend(self.graph[_class])
             return False
 
-        def type_check(self,cl):
-            '''Make sure the inferred types match the declared types'''
-            for feature in cl.features:
-                if isinstance(feature, Attr):
-                    
-                    if feature.type == "SELF_TYPE":
-                        realtype = cl.name
-                    else:
-                        realtype = feature.type
-                    if feature.expr:
-                        self.check_expression_type(feature.expr,cl)
-                        child_type = feature.expr.return_type
-                        parent_type = realtype
-                        if not self.is_child(child_type,parent_type):
-                            raise Error("Tipo inferido %s para o atributo %s diferente do declado %s" % (child_type, feature.ident.name, parent_type))
-                elif isinstance(feature, Method):
-                    for formal in feature.formals:
-                        if formal.type == "SELF_TYPE":
-                            raise Error("%s não pode ter self type" % formal[0])
-                        elif formal.type not in self.classes_map:
-                            raise Error("%s tipo indefinido" % formal.ident.name)
-
-                        if feature.type == "SELF_TYPE":
-                            real_return_type = cl.name
-                        else:
-                            real_return_type = feature.type
-
-                        if feature.expr is None:
-                            if feature.type == "SELF_TYPE":
-                                returned_type = cl.name
-                            else:
-                                returned_type = feature.type
-
-                        else:
-                            self.check_expression_type(feature.expr,cl)
-                            returned_type = feature.type
-                        if not self.is_child(returned_type,real_return_type):
-                            raise Error("tipo inferido %s no metodo %s nao esta conforme o tipo declarado %s") %(returned_type,feature.ident.name,real_return_type)
-
-        def check_expression_type(self,expression,cl):
-            '''make sure types validate at any point in the ast'''
-            #print(expression)
-            if isinstance(expression, type_fields['Assign']):
-                self.check_expression_type(expression.expr, cl)
-                if not self.is_child(expression.expr.return_type, expression.ident.name.return_type):
-                    raise Error("Tipo inferido %s em %s nao estah conforme o tipo declarado %s" % (expression.expr.return_type, expression.ident.name, expression.name.return_type))
-            
-            elif isinstance(expression, BinOp):
-                self.check_expression_type(expression.left,cl)
-                self.check_expression_type(expression.right,cl)
-                if not (self.is_child(expression.left.return_type, expression.right.return_type) or self.is_child(expression.right.return_type, expression.left.return_type)):
-                    raise Error("Tipo inferido %s em %s nao estah conforme o tipo declarado %s em %s" % (expression.left.return_type, expression.operator, expression.right.return_type, expression))
-
-            elif isinstance(expression, type_fields['If']):
-                self.check_expression_type(expression.condition, cl)
-                self.check_expression_type(expression.true, cl)
-                self.check_expression_type(expression.false, cl)
-                if expression.condition.return_type != "Bool":
-                    raise Error("Condicionais do tipo IF devem ter condições booleanas declaradas")
-
-            elif isinstance(expression, type_fields['Let']):
-                for line in expression.elements:
-                    self.check_expression_type(line,cl)
-
-            elif isinstance(expression, type_fields['While']):
-                self.check_expression_type(expression.condition,cl)
-                self.check_expression_type(expression.body, cl)
-                if expression.condition.return_type != "Bool":
-                        raise Error("Condicionais do tipo WHILE devem ter condições booleanas declaradas") 
-
-def main(sourcefile):
+        def check_Assign(self, expression, scopes, cl):
+            if not self.is_child(self.type_of(expression.expr), expression.ident.return_type):
+                raise Error("Tipo inferido %s em %s nao estah conforme o tipo declarado %s" % (self.type_of(expression.expr), expression.ident.name, expression.ident.return_type))
+
+        def check_BinOp(self, expression, scopes, cl):
+            left_type, right_type = self.type_of(expression.left), self.type_of(expression.right)
+            if not (self.is_child(left_type, right_type) or self.is_child(right_type, left_type)):
+                raise Error("Tipo inferido %s em %s nao estah conforme o tipo declarado %s em %s" % (left_type, expression.operator, right_type, expression))
+
+        def check_If(self, expression, scopes, cl):
+            if self.type_of(expression.condition) != "Bool":
+                raise Error("Condicionais do tipo IF devem ter condições booleanas declaradas")
+
+        def check_While(self, expression, scopes, cl):
+            if self.type_of(expression.condition) != "Bool":
+                    raise Error("Condicionais do tipo WHILE devem ter condições booleanas declaradas") 
+
+        def check_FunctCall(self, expression, scopes, cl):
+            method = self.resolve_method(cl.name, expression.ident.name)
+            self.check_call_arguments(method, expression.params)
+
+        def check_MethodCall(self, expression, scopes, cl):
+            call = expression.method
+            method = self.resolve_method(self.dispatch_type(expression), call.ident.name)
+            self.check_call_arguments(method, call.params)
+
+        def check_call_arguments(self, method, params):
+            if len(params) != len(method.formals):
+                raise Error("Metodo %s espera %d argumentos, recebeu %d" % (method.ident.name, len(method.formals), len(params)))
+            for param, formal in zip(params, method.formals):
+                if not self.is_child(self.type_of(param), formal.type):
+                    raise Error("Tipo inferido %s para o argumento %s do metodo %s nao estah conforme o tipo declarado %s" % (self.type_of(param), formal.ident.name, method.ident.name, formal.type))
+
+# The Semantic object a worker types classes with, shipped once per process
+_worker_semantic = None
+
+def _init_type_worker(semantic):
+    global _worker_semantic
+    _worker_semantic = semantic
+
+def _type_class_in_worker(name):
+    cl = _worker_semantic.classes_map[name]
+    error = None
     try:
-        s = Semantic(sourcefile)
-
-        s.map_and_create_initial_graph()
-        s.check_for_wrong_inheritance()
-        s.check_for_undefined_classes()        
-        s.expand_inherited_classes()
-        s.create_method_map()
-        s.check_for_inheritance_cycles()
-
-        class_map_values = s.classes_map.values()
-
-        # print(class_map_values)
-
-        for classes in class_map_values:
-            s.infer_return_types(classes)
+        _worker_semantic.type_class(cl)
+    except Error as e:
+        error = str(e)
+    return [node.return_type for node in iter_nodes(cl)], _worker_semantic.dependencies.get(name), error
+
+def class_fingerprint(cl):
+    '''
+    The digest of the class's source text when the parser recorded one, else a
+    fingerprint of its AST. Either way equal fingerprints mean equal classes; the
+    two kinds never compare equal, which only costs typing the class again.
+    '''
+    return cl.digest if cl.digest is not None else fingerprint(cl)
+
+def recheck(previous, ast, workers=None):
+    '''
+    Semantic check of ast, a new version of the program `previous` checked, typing only
+    the classes affected by the edit. Returns the new Semantic and the re-typed class names.
+
+    Classes with the same fingerprint as their previous version are replaced by the typed
+    nodes of previous, so they are shared with it from here on and previous should no
+    longer be used. Fingerprints are kept on the new Semantic for the next recheck.
+    '''
+    old = previous.classes_map
+    fingerprints = {}
+    reused = []
+    for cl in ast:
+        digest = fingerprints[cl.name] = class_fingerprint(cl)
+        if cl.name in old and previous.fingerprint(cl.name) == digest:
+            cl = old[cl.name]
+        reused.append(cl)
+    s = Semantic(ast=tuple(reused))
+    s.fingerprints.update(fingerprints)
+    s.build_tables()
+    with pass_timer.measure('semantic', 'retype_classes', s.ast):
+        retyped = s.retype_classes(previous, workers)
+    return s, retyped
+
+def main(sourcefile, use_cache=True, workers=None):
+    try:
+        with pass_timer.measure('parse', 'parse') as record:
+            s = Semantic(sourcefile, use_cache)
+            if record is not None:
+                record['output'] = s.ast
 
-        for classes in class_map_values:
-            s.type_check(classes)
+        s.build_tables()
+        with pass_timer.measure('semantic', 'type_classes', s.ast):
+            s.type_classes(workers)
 
-        print("\n\n\n SEMANTIC CHECK DONE \n\n\n")
+        # stderr, codegen --stdout --json writes the program to stdout
+        print("\n\n\n SEMANTIC CHECK DONE \n\n\n", file=sys.stderr)
 
         # TODO: Create an print function for best visualization
         # print(s.ast)
         return s.ast
     
     except Exception as e:
-        print ("Error: %s"% e)
+        print ("Error: %s"% e, file=sys.stderr)
 
 if __name__ == '__main__':
     import sys
     sourcefile = sys.argv[1]
-    main(sourcefile)
\ No newline at end of file
+    # --workers=N types classes across N processes
+    workers = [int(arg.split('=', 1)[1]) for arg in sys.argv[2:] if arg.startswith('--workers=')]
+    log = pass_timer.from_argv(sys.argv[2:])
+    main(sourcefile, '--no-cache' not in sys.argv[2:], workers[-1] if workers else None)
+    pass_timer.finish(log)
+    parser.report_cache_stats()
\ No newline at end of file
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import pickle
+import sys
+
+# On-disk cache of parsed ASTs.
+#
+# Entries are keyed by a hash of the source text plus a version string that
+# changes with the grammar and the AST format, so an entry can only be reused
+# for the exact same input and compiler. Every entry is one pickle file; the
+# file mtime is refreshed on each hit and the oldest files are evicted once the
+# directory grows past max_bytes (LRU). The directory is only listed on the
+# first put and whenever the size written since then goes over max_bytes.
+# Caching is best-effort: an AST that cannot be written is simply skipped.
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Eviction goes down to this fraction of max_bytes, so the directory is listed
+# again only after another tenth of max_bytes has been written
+EVICT_TO = 0.9
+
+
+class AstCache:
+    def __init__(self, directory, version, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.version = version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.skipped = 0
+        # Bytes in the directory as far as this process knows, None until listed
+        self.size = None
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source):
+        digest = hashlib.sha256()
+        digest.update(self.version.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, source):
+        return os.path.join(self.directory, self.key(source) + '.ast')
+
+    def get(self, source):
+        """Return the cached AST for source, or None on a miss"""
+        path = self.path(source)
+        try:
+            with open(path, 'rb') as f:
+                ast = pickle.load(f)
+        except Exception:
+            # Missing or unreadable entry, either way it has to be parsed again
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return ast
+
+    def put(self, source, ast):
+        path = self.path(source)
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            with open(tmp, 'wb') as f:
+                pickle.dump(ast, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        except Exception as e:
+            # Not being able to cache never fails the compilation
+            self.skipped += 1
+            print('ast cache: not caching %s: %s: %s' % (self.key(source)[:12], type(e).__name__, e),
+                  file=sys.stderr)
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        if self.size is None:
+            self.evict()
+        else:
+            self.size += size
+            if self.size > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        """List the directory, remove the oldest entries if over max_bytes and resync size"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.ast'):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+            total += st.st_size
+
+        entries.sort()
+        limit = self.max_bytes * EVICT_TO if total > self.max_bytes else total
+        for _, size, name in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self.size = total
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'skipped': self.skipped,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
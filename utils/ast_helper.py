@@ -1,5 +1,3 @@
-import collections
-import types
 
 # A minimal way to construct a tree is to simply create 
 # and propagate a tuple or list in each grammar rule function. 
@@ -17,29 +15,227 @@ import types
 #          self.value = value
  
 
+import hashlib
+
+
 class Returnable:
-    return_type = None    
+    """
+    Base class of every AST node. Nodes keep their fields in __slots__ (no
+    per-instance __dict__), plus the type inferred by the semantic phase.
+    They still behave like the namedtuples they replace: fields can be read
+    by name, by index or by unpacking.
+
+    Equality, hashing, repr and pickling walk the subtree with an explicit
+    stack, like iter_nodes, so they work on trees of any depth.
+    """
+    __slots__ = ('return_type',)
+    _fields = ()
+    # slots that are not fields: left out of equality, set to None by __init__
+    _extra = ()
+
+    def _values(self):
+        return ()
+
+    def __iter__(self):
+        return iter(self._values())
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __getitem__(self, index):
+        return self._values()[index]
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        stack = [(self, other)]
+        while stack:
+            a, b = stack.pop()
+            if a is b:
+                continue
+            if type(a) is not type(b):
+                return False
+            if isinstance(a, (Returnable, tuple, list)):
+                if len(a) != len(b):
+                    return False
+                stack.extend(zip(a, b))
+            elif a != b:
+                return False
+        return True
+
+    def __hash__(self):
+        # return_type is left out, as it is by __eq__
+        return hash(tuple(code[:2] for code in _postorder(self)))
+
+    def __repr__(self):
+        parts = []
+        # (True, text) is emitted as is, (False, value) is rendered
+        stack = [(False, self)]
+        while stack:
+            is_text, value = stack.pop()
+            if is_text:
+                parts.append(value)
+                continue
+            if isinstance(value, Returnable):
+                items = [(True, type(value).__name__ + '(')]
+                for i, name in enumerate(value._fields):
+                    items.append((True, (', ' if i else '') + name + '='))
+                    items.append((False, getattr(value, name)))
+                items.append((True, ')'))
+            elif isinstance(value, (tuple, list)):
+                items = [(True, '(' if isinstance(value, tuple) else '[')]
+                for i, item in enumerate(value):
+                    if i:
+                        items.append((True, ', '))
+                    items.append((False, item))
+                if isinstance(value, tuple):
+                    items.append((True, ',)' if len(value) == 1 else ')'))
+                else:
+                    items.append((True, ']'))
+            else:
+                items = [(True, repr(value))]
+            stack.extend(reversed(items))
+        return ''.join(parts)
+
+    def __reduce__(self):
+        # Pickle the subtree as a flat postorder program rebuilt by _rebuild, so
+        # pickle itself never recurses deeper than one level
+        return (_rebuild, (list(_postorder(self)),))
+
+    def _asdict(self):
+        return {name: getattr(self, name) for name in self._fields}
+
+    def _replace(self, **changes):
+        values = self._asdict()
+        values.update(changes)
+        node = type(self)(**values)
+        node.return_type = self.return_type
+        return node
+
+def _postorder(root):
+    """
+    The subtree under root as a postorder program: (node class, field count,
+    return type, extra slot values) for a node, (tuple or list, length) for a
+    sequence and (None, value) for a literal, each built from the values before it.
+    """
+    stack = [(root, False)]
+    while stack:
+        value, expanded = stack.pop()
+        if isinstance(value, Returnable):
+            if expanded:
+                yield (type(value), len(value), value.return_type,
+                       tuple(getattr(value, name) for name in value._extra))
+            else:
+                stack.append((value, True))
+                stack.extend((item, False) for item in reversed(value._values()))
+        elif isinstance(value, (tuple, list)):
+            if expanded:
+                yield (type(value), len(value))
+            else:
+                stack.append((value, True))
+                stack.extend((item, False) for item in reversed(value))
+        else:
+            yield (None, value)
+
+def _rebuild(codes):
+    """Inverse of _postorder."""
+    stack = []
+    for code in codes:
+        kind = code[0]
+        if kind is None:
+            stack.append(code[1])
+            continue
+        count = code[1]
+        values = stack[len(stack) - count:]
+        del stack[len(stack) - count:]
+        if kind is tuple or kind is list:
+            stack.append(kind(values))
+        else:
+            node = kind(*values)
+            node.return_type = code[2]
+            for name, extra in zip(kind._extra, code[3]):
+                setattr(node, name, extra)
+            stack.append(node)
+    return stack[0]
+
+def fingerprint(root):
+    """Digest of the subtree under root, the same for equal subtrees. Inferred types are left out."""
+    parts = []
+    for code in _postorder(root):
+        kind = code[0]
+        parts.append(repr(code[1]) if kind is None else '%s/%d' % (kind.__name__, code[1]))
+    return hashlib.blake2b('\0'.join(parts).encode('utf-8'), digest_size=16).digest()
+
+def iter_nodes(root):
+    """Every node under root, root included, in a fixed preorder. Literals are skipped."""
+    stack = [root]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, Returnable):
+            yield value
+            stack.extend(reversed(tuple(value)))
+        elif isinstance(value, (tuple, list)):
+            # class features are a list, every other sequence is a tuple
+            stack.extend(reversed(value))
+
+def annotate(root, types):
+    """Set return_type on every node under root from types, given in iter_nodes order."""
+    types = iter(types)
+    stack = [root]
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        value = pop()
+        if isinstance(value, Returnable):
+            value.return_type = next(types)
+            extend(reversed(value._values()))
+        elif value.__class__ is tuple or value.__class__ is list:
+            extend(reversed(value))
+
+def node_class(type_name, fields, extra=''):
+    fields = tuple(fields.split())
+    extra = tuple(extra.split())
+    # Generate a plain __init__ for the exact fields, like namedtuple does,
+    # so building millions of nodes does not go through *args handling
+    args = ', '.join(fields)
+    body = ''.join('    self.%s = %s\n' % (name, name) for name in fields)
+    body += ''.join('    self.%s = None\n' % name for name in extra)
+    source = 'def __init__(self, %s):\n%s    self.return_type = None\n' % (args, body)
+    # and a plain tuple of the field values, what iteration and equality go through
+    source += 'def _values(self):\n    return (%s)\n' % ''.join('self.%s, ' % name for name in fields)
+    namespace = {}
+    exec(source, namespace)
 
-def named_tuple(type_name, fields):
-    return types.new_class(type_name, (Returnable, collections.namedtuple(type_name, fields)))
+    cls = type(type_name, (Returnable,), {
+        '__slots__': fields + extra,
+        '_fields': fields,
+        '_extra': extra,
+        '__init__': namespace['__init__'],
+        '_values': namespace['_values'],
+        # Make the class reachable as utils.ast_helper.<type_name> so nodes can be
+        # pickled, e.g. when ASTs are sent back from worker processes
+        '__module__': __name__,
+    })
+    globals()[type_name] = cls
+    return cls
 
 type_fields = {
-'Assign' : named_tuple('Assign', 'ident expr'),
-'Attr': named_tuple('Attribute', 'ident type expr'),
-'BinOp': named_tuple('BinaryOperation', 'operator left right'),
-'Block': named_tuple('Block', 'elements'),
-'Case': named_tuple('Case', 'expr typeactions'),
-'Formal': named_tuple('Formal', 'ident type'),
-'FunctCall': named_tuple('FunctionCall', 'ident params'),
-'Ident': named_tuple('Ident', 'name'),
-'If': named_tuple('If', 'condition true false'),
-'Let': named_tuple('Let', 'assignments expr'),
-'Method': named_tuple('Method', 'ident type formals expr'),
-'MethodCall': named_tuple('MethodCall', 'object targettype method'),
-'New': named_tuple('New', 'type'),
-'Self': named_tuple('Self','ident'),
-'Types': named_tuple('Type', 'name inherits features'),
-'TypeAction': named_tuple('TypeAction', 'ident type expr'),
-'UnOp': named_tuple('UnaryOperation', 'operator right'),
-'While': named_tuple('While', 'condition action'),
+'Assign' : node_class('Assign', 'ident expr'),
+'Attr': node_class('Attribute', 'ident type expr'),
+'BinOp': node_class('BinaryOperation', 'operator left right'),
+'Block': node_class('Block', 'elements'),
+'Case': node_class('Case', 'expr typeactions'),
+'Formal': node_class('Formal', 'ident type'),
+'FunctCall': node_class('FunctionCall', 'ident params'),
+'Ident': node_class('Ident', 'name'),
+'If': node_class('If', 'condition true false'),
+'Let': node_class('Let', 'assignments expr'),
+'Method': node_class('Method', 'ident type formals expr'),
+'MethodCall': node_class('MethodCall', 'object targettype method'),
+'New': node_class('New', 'type'),
+'Self': node_class('Self','ident'),
+# digest: hash of the class's source text, set by the parser (see semantic.recheck)
+'Types': node_class('Type', 'name inherits features', 'digest'),
+'TypeAction': node_class('TypeAction', 'ident type expr'),
+'UnOp': node_class('UnaryOperation', 'operator right'),
+'While': node_class('While', 'condition action'),
 }
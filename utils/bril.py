@@ -0,0 +1,110 @@
+import json
+
+# Bril programs as data.
+#
+# A Program is a list of Functions; a Function has typed args, an optional
+# return type and a list of instructions. Instructions are kept exactly as
+# canonical Bril JSON objects, e.g.
+#
+#   {'op': 'const', 'dest': 'x', 'type': 'int', 'value': 0}
+#   {'op': 'call', 'dest': 'r', 'type': 'int', 'args': ['a'], 'funcs': ['f']}
+#   {'label': 'loop'}
+#
+# so to_json() is just the program's dict and the standard Bril tools can
+# read it with no bril2json step. to_text() prints the same program in the
+# textual form bril2txt produces.
+
+class Function:
+    def __init__(self, name, args=(), type=None):
+        self.name = name
+        # [(name, type)]
+        self.args = list(args)
+        self.type = type
+        self.instrs = []
+        # instrs are in SSA form, with phis (see optimizer.into_ssa)
+        self.ssa = False
+
+    def const(self, dest, type, value):
+        self.instrs.append({'op': 'const', 'dest': dest, 'type': type, 'value': value})
+
+    def value(self, op, dest, type, args=(), funcs=None, labels=None):
+        '''an instruction that produces dest'''
+        instr = {'op': op, 'dest': dest, 'type': type, 'args': list(args)}
+        if funcs:
+            instr['funcs'] = list(funcs)
+        if labels:
+            instr['labels'] = list(labels)
+        self.instrs.append(instr)
+
+    def effect(self, op, args=(), funcs=None, labels=None):
+        '''an instruction run for its effect only: print, jmp, br, ret, call without a result'''
+        instr = {'op': op, 'args': list(args)}
+        if funcs:
+            instr['funcs'] = list(funcs)
+        if labels:
+            instr['labels'] = list(labels)
+        self.instrs.append(instr)
+
+    def label(self, name):
+        self.instrs.append({'label': name})
+
+    def to_json(self):
+        function = {'name': self.name, 'instrs': self.instrs}
+        if self.args:
+            function['args'] = [{'name': name, 'type': type} for name, type in self.args]
+        if self.type is not None:
+            function['type'] = self.type
+        return function
+
+    def to_text(self):
+        '''lines of the function in Bril's text form'''
+        header = '@' + self.name
+        if self.args:
+            header += '(%s)' % ', '.join('%s: %s' % arg for arg in self.args)
+        if self.type is not None:
+            header += ': ' + self.type
+        lines = [header + ' {']
+        for instr in self.instrs:
+            if 'label' in instr:
+                lines.append('.%s:' % instr['label'])
+            else:
+                lines.append('  %s;' % instr_text(instr))
+        lines.append('}')
+        return lines
+
+
+def instr_text(instr):
+    if instr['op'] == 'const':
+        value = instr['value']
+        operands = ['const', ('true' if value else 'false') if isinstance(value, bool) else str(value)]
+    else:
+        operands = [instr['op']]
+        operands += ['@' + func for func in instr.get('funcs', ())]
+        operands += instr.get('args', ())
+        operands += ['.' + label for label in instr.get('labels', ())]
+    text = ' '.join(operands)
+    if 'dest' in instr:
+        return '%s: %s = %s' % (instr['dest'], instr['type'], text)
+    return text
+
+
+class Program:
+    def __init__(self):
+        self.functions = []
+
+    def function(self, name, args=(), type=None):
+        function = Function(name, args, type)
+        self.functions.append(function)
+        return function
+
+    def to_json(self):
+        return {'functions': [function.to_json() for function in self.functions]}
+
+    def dumps(self):
+        return json.dumps(self.to_json(), indent=2)
+
+    def to_text(self):
+        lines = []
+        for function in self.functions:
+            lines.extend(function.to_text())
+        return lines
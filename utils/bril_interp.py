@@ -0,0 +1,120 @@
+# A reference interpreter for core Bril (int, bool, arithmetic, comparisons,
+# logic, jmp/br/call/ret, print, id, nop) and the SSA extension's phi, so
+# the optimizer's SSA form can be run as well, over the canonical JSON form
+# of utils.bril. It counts every instruction it executes, labels excluded,
+# which is the same dynamic instruction count `brili -p` reports, so the
+# effect of an optimization can be measured without the Bril toolchain.
+
+import sys
+
+_binary = {
+    'add': lambda a, b: a + b,
+    'sub': lambda a, b: a - b,
+    'mul': lambda a, b: a * b,
+    # Bril division truncates towards zero
+    'div': lambda a, b: int(a / b) if (a < 0) != (b < 0) else a // b,
+    'eq': lambda a, b: a == b,
+    'lt': lambda a, b: a < b,
+    'gt': lambda a, b: a > b,
+    'le': lambda a, b: a <= b,
+    'ge': lambda a, b: a >= b,
+    'and': lambda a, b: a and b,
+    'or': lambda a, b: a or b,
+}
+
+def _wrap(value):
+    # Bril ints are 64-bit two's complement
+    if isinstance(value, bool):
+        return value
+    return (value + 2 ** 63) % 2 ** 64 - 2 ** 63
+
+
+class BrilError(Exception):
+    pass
+
+
+class Interpreter:
+    def __init__(self, program, out=None):
+        self.functions = {function['name']: function for function in program['functions']}
+        self.out = out if out is not None else sys.stdout
+        self.count = 0
+        # opcode -> times executed
+        self.ops = {}
+        # function name -> label -> instruction index
+        self.labels = {}
+
+    def run(self, args=()):
+        '''Run @main, returns the number of instructions executed'''
+        self.call('main', list(args))
+        return self.count
+
+    def call(self, name, args):
+        function = self.functions.get(name)
+        if function is None:
+            raise BrilError('undefined function @%s' % name)
+        instrs = function['instrs']
+        labels = self.labels.get(name)
+        if labels is None:
+            labels = self.labels[name] = {instr['label']: i for i, instr in enumerate(instrs) if 'label' in instr}
+        env = {arg['name']: value for arg, value in zip(function.get('args', ()), args)}
+
+        pc = 0
+        label = previous = None
+        # the phis at the top of a block all read the values from before the block
+        phis = {}
+        while pc < len(instrs):
+            instr = instrs[pc]
+            pc += 1
+            op = instr.get('op')
+            if op is None:
+                label, previous = instr['label'], label
+                continue
+            self.count += 1
+            self.ops[op] = self.ops.get(op, 0) + 1
+            if op == 'phi':
+                if previous in instr['labels']:
+                    arg = instr['args'][instr['labels'].index(previous)]
+                    if arg in env:
+                        phis[instr['dest']] = env[arg]
+                continue
+            if phis:
+                env.update(phis)
+                phis.clear()
+            try:
+                values = [env[arg] for arg in instr.get('args', ())]
+            except KeyError as e:
+                raise BrilError('undefined variable %s in @%s' % (e.args[0], name))
+
+            if op == 'const':
+                env[instr['dest']] = instr['value']
+            elif op == 'id':
+                env[instr['dest']] = values[0]
+            elif op in _binary:
+                if op == 'div' and values[1] == 0:
+                    raise BrilError('division by zero in @%s' % name)
+                env[instr['dest']] = _wrap(_binary[op](*values))
+            elif op == 'not':
+                env[instr['dest']] = not values[0]
+            elif op == 'jmp':
+                pc = labels[instr['labels'][0]]
+            elif op == 'br':
+                pc = labels[instr['labels'][0 if values[0] else 1]]
+            elif op == 'call':
+                result = self.call(instr['funcs'][0], values)
+                if 'dest' in instr:
+                    env[instr['dest']] = result
+            elif op == 'ret':
+                return values[0] if values else None
+            elif op == 'print':
+                self.out.write(' '.join(('true' if v else 'false') if isinstance(v, bool) else str(v)
+                                        for v in values) + '\n')
+            elif op == 'nop':
+                pass
+            else:
+                raise BrilError('unknown opcode %s' % op)
+        return None
+
+
+def run(program, args=(), out=None):
+    '''Interpret a Bril JSON program, returns the dynamic instruction count'''
+    return Interpreter(program, out).run(args)
@@ -0,0 +1,81 @@
+# Call graph of a Bril program (utils.bril.Program).
+#
+# calls[caller][callee] is the number of call instructions in caller naming
+# callee. Passes that add or remove calls keep it up to date with add() and
+# remove() instead of rebuilding it.
+
+class CallGraph:
+    def __init__(self, program):
+        self.calls = {function.name: {} for function in program.functions}
+        for function in program.functions:
+            for instr in function.instrs:
+                if instr.get('op') == 'call':
+                    self.add(function.name, instr['funcs'][0])
+
+    def add(self, caller, callee, sites=1):
+        callees = self.calls.setdefault(caller, {})
+        callees[callee] = callees.get(callee, 0) + sites
+
+    def remove(self, caller, callee, sites=1):
+        callees = self.calls[caller]
+        callees[callee] -= sites
+        if not callees[callee]:
+            del callees[callee]
+
+    def callers(self, callee):
+        return [caller for caller, callees in self.calls.items() if callee in callees]
+
+    def sccs(self):
+        '''
+        Strongly connected components (Tarjan's algorithm, iterative), callees
+        before their callers; each is a list of names in program order.
+        '''
+        order = {name: i for i, name in enumerate(self.calls)}
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        components = []
+        for root in self.calls:
+            if root in index:
+                continue
+            work = [(root, iter(self.calls[root]))]
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                name, callees = work[-1]
+                for callee in callees:
+                    if callee not in self.calls:
+                        continue
+                    if callee not in index:
+                        index[callee] = low[callee] = len(index)
+                        stack.append(callee)
+                        on_stack.add(callee)
+                        work.append((callee, iter(self.calls[callee])))
+                        break
+                    if callee in on_stack:
+                        low[name] = min(low[name], index[callee])
+                else:
+                    work.pop()
+                    if work:
+                        caller = work[-1][0]
+                        low[caller] = min(low[caller], low[name])
+                    if low[name] == index[name]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == name:
+                                break
+                        components.append(sorted(component, key=order.get))
+        return components
+
+    def recursive(self):
+        '''Names of the functions that can call themselves, directly or not'''
+        names = set()
+        for component in self.sccs():
+            if len(component) > 1 or component[0] in self.calls[component[0]]:
+                names.update(component)
+        return names
@@ -0,0 +1,260 @@
+# Basic blocks, control-flow graphs and dominators of Bril functions.
+#
+# Instructions are the canonical JSON dicts of utils.bril. A block starts at a
+# label or after a terminator (jmp, br, ret) and ends at a terminator or before
+# the next label; the label, if any, is the block's first instruction.
+
+TERMINATORS = ('jmp', 'br', 'ret')
+
+
+class IterationLimit(Exception):
+    '''An analysis did not reach its fixed point within the rounds it was given'''
+    pass
+
+
+def form_blocks(instrs):
+    blocks = []
+    block = []
+    for instr in instrs:
+        if 'label' in instr:
+            if block:
+                blocks.append(block)
+            block = [instr]
+        else:
+            block.append(instr)
+            if instr['op'] in TERMINATORS:
+                blocks.append(block)
+                block = []
+    if block:
+        blocks.append(block)
+    return blocks
+
+def flatten(blocks):
+    return [instr for block in blocks for instr in block]
+
+
+class CFG:
+    '''
+    The blocks of a function by label, in program order, and the edges between
+    them. Every block starts with its label and ends with a terminator: blocks
+    without a label get a fresh one, falling through becomes an explicit jmp and
+    falling off the end a ret. The first block is the entry and has no
+    predecessors. instrs() gives back the flat list without the jmps and labels
+    that are not needed.
+    '''
+
+    def __init__(self, instrs):
+        self.taken = {instr['label'] for instr in instrs if 'label' in instr}
+        blocks = form_blocks(instrs)
+        if not blocks or 'label' in blocks[0][0]:
+            # the first label may be a jump target, the entry must not be
+            blocks.insert(0, [])
+
+        self.order = []
+        self.blocks = {}
+        for block in blocks:
+            if not block or 'label' not in block[0]:
+                block.insert(0, {'label': self.fresh_label('entry' if not self.order else 'b')})
+            self.order.append(block[0]['label'])
+            self.blocks[block[0]['label']] = block
+
+        for i, name in enumerate(self.order):
+            block = self.blocks[name]
+            if 'op' not in block[-1] or block[-1]['op'] not in TERMINATORS:
+                if i + 1 < len(self.order):
+                    block.append({'op': 'jmp', 'args': [], 'labels': [self.order[i + 1]]})
+                else:
+                    block.append({'op': 'ret', 'args': []})
+        self.edges()
+
+    def fresh_label(self, prefix):
+        n = len(self.taken)
+        while '%s.%d' % (prefix, n) in self.taken:
+            n += 1
+        label = '%s.%d' % (prefix, n)
+        self.taken.add(label)
+        return label
+
+    @property
+    def entry(self):
+        return self.order[0]
+
+    def edges(self):
+        '''(Re)compute succs and preds from the terminators'''
+        self.succs = {name: successors(self.blocks[name][-1]) for name in self.order}
+        self.preds = {name: [] for name in self.order}
+        for name in self.order:
+            for succ in self.succs[name]:
+                if name not in self.preds[succ]:
+                    self.preds[succ].append(name)
+
+    def add_block(self, after, instrs):
+        '''Insert a new labeled block after the block named after'''
+        name = self.fresh_label('b')
+        self.blocks[name] = [{'label': name}] + instrs
+        self.order.insert(self.order.index(after) + 1, name)
+        return name
+
+    def merge_blocks(self):
+        '''
+        Append every block whose only predecessor jumps to it to that predecessor.
+        Not for SSA form: phis name their predecessors by label.
+        '''
+        merged = set()
+        for name in self.order:
+            if name in merged:
+                continue
+            block = self.blocks[name]
+            while block[-1]['op'] == 'jmp':
+                succ = block[-1]['labels'][0]
+                if succ == name or succ == self.entry or self.preds[succ] != [name]:
+                    break
+                block.pop()
+                block.extend(self.blocks.pop(succ)[1:])
+                merged.add(succ)
+                for after in self.succs[succ]:
+                    self.preds[after] = [name if pred == succ else pred for pred in self.preds[after]]
+                self.succs[name] = self.succs.pop(succ)
+        if merged:
+            self.order = [name for name in self.order if name not in merged]
+            self.edges()
+
+    def reverse_postorder(self):
+        '''Labels of the blocks reachable from the entry, in reverse postorder'''
+        postorder = []
+        seen = {self.entry}
+        stack = [(self.entry, iter(self.succs[self.entry]))]
+        while stack:
+            name, succs = stack[-1]
+            for succ in succs:
+                if succ not in seen:
+                    seen.add(succ)
+                    stack.append((succ, iter(self.succs[succ])))
+                    break
+            else:
+                stack.pop()
+                postorder.append(name)
+        postorder.reverse()
+        return postorder
+
+    def remove_unreachable(self):
+        reachable = set(self.reverse_postorder())
+        if len(reachable) == len(self.order):
+            return False
+        self.order = [name for name in self.order if name in reachable]
+        self.blocks = {name: self.blocks[name] for name in self.order}
+        self.edges()
+        return True
+
+    def dominators(self, max_iterations=None):
+        '''
+        Immediate dominator of every reachable block, the entry being its own
+        (Cooper, Harvey and Kennedy's iterative algorithm). Raises IterationLimit
+        after max_iterations rounds over the blocks without reaching the fixed point.
+        '''
+        order = self.reverse_postorder()
+        index = {name: i for i, name in enumerate(order)}
+        idom = {self.entry: self.entry}
+
+        def intersect(a, b):
+            while a != b:
+                while index[a] > index[b]:
+                    a = idom[a]
+                while index[b] > index[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        rounds = 0
+        while changed:
+            rounds += 1
+            if max_iterations is not None and rounds > max_iterations:
+                raise IterationLimit('dominators of %d blocks' % len(order))
+            changed = False
+            for name in order[1:]:
+                new = None
+                for pred in self.preds[name]:
+                    if pred in idom:
+                        new = pred if new is None else intersect(pred, new)
+                if idom.get(name) != new:
+                    idom[name] = new
+                    changed = True
+        return idom
+
+    def dominator_tree(self, idom):
+        '''label -> labels it immediately dominates, in program order'''
+        children = {name: [] for name in idom}
+        for name in self.order:
+            if name in idom and name != self.entry:
+                children[idom[name]].append(name)
+        return children
+
+    def frontier(self, idom):
+        '''label -> labels in its dominance frontier'''
+        frontier = {name: set() for name in idom}
+        for name in idom:
+            preds = [pred for pred in self.preds[name] if pred in idom]
+            if len(preds) < 2:
+                continue
+            for pred in preds:
+                runner = pred
+                while runner != idom[name]:
+                    frontier[runner].add(name)
+                    runner = idom[runner]
+        return frontier
+
+    def natural_loops(self, idom):
+        '''
+        (header, body) of every natural loop, body being the set of its block
+        labels, the header included. Back edges to the same header make one
+        loop. Inner loops come before the loops containing them.
+        '''
+        bodies = {}
+        for name in idom:
+            for header in self.succs[name]:
+                if not _dominates(idom, header, name):
+                    continue
+                body = bodies.setdefault(header, {header})
+                work = [name]
+                while work:
+                    block = work.pop()
+                    if block not in body:
+                        body.add(block)
+                        work.extend(pred for pred in self.preds[block] if pred in idom)
+        return sorted(bodies.items(), key=lambda loop: len(loop[1]))
+
+    def instrs(self, compact=True):
+        '''
+        The flat instruction list. compact drops the jmps to the next block, a
+        ret without a value ending the function and the labels no instruction
+        refers to; the SSA form keeps them, phis name their predecessors by label.
+        '''
+        if not compact:
+            return flatten(self.blocks[name] for name in self.order)
+        following = dict(zip(self.order, self.order[1:]))
+        falls_through = {name for name in self.order
+                         if self.blocks[name][-1]['op'] == 'jmp' and self.blocks[name][-1]['labels'][0] == following.get(name)}
+        targets = {label for name in self.order for instr in self.blocks[name] for label in instr.get('labels', ())
+                   if not (instr is self.blocks[name][-1] and name in falls_through)}
+        instrs = []
+        for name in self.order:
+            block = self.blocks[name]
+            if name in targets:
+                instrs.append(block[0])
+            instrs.extend(block[1:-1] if name in falls_through else block[1:])
+        if instrs and instrs[-1].get('op') == 'ret' and not instrs[-1]['args']:
+            instrs.pop()
+        return instrs
+
+def _dominates(idom, a, b):
+    while b != a:
+        if idom[b] == b:
+            return False
+        b = idom[b]
+    return True
+
+def successors(instr):
+    op = instr.get('op')
+    if op in ('jmp', 'br'):
+        return list(dict.fromkeys(instr['labels']))
+    return []
@@ -0,0 +1,34 @@
+import os
+
+# Output buffer for generated code.
+#
+# By default emitted lines are kept in memory and written out once, at the
+# end, with save(): the file is written next to its destination and renamed
+# over it, so a run either leaves the complete new output or the old file,
+# never a truncated or appended-to one. Given a file-like object instead
+# (sys.stdout, a socket file, io.StringIO) every line goes straight to it, so
+# output can be streamed through that object's own buffering.
+
+class Emitter:
+    def __init__(self, out=None):
+        self.out = out
+        self.lines = []
+        self.count = 0
+
+    def line(self, text, indent=0):
+        self.count += 1
+        line = '\t' * indent + text + '\n'
+        if self.out is not None:
+            self.out.write(line)
+        else:
+            self.lines.append(line)
+
+    def getvalue(self):
+        return ''.join(self.lines)
+
+    def save(self, path):
+        '''Atomically replace path with everything emitted so far'''
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp, 'w') as f:
+            f.writelines(self.lines)
+        os.replace(tmp, path)
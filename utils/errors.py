@@ -1,8 +1,12 @@
+import sys
+
+
+# Diagnostics go to stderr, stdout may carry machine-readable output (--json)
 class Error(Exception):
-    print('ERROR!')
+    print('ERROR!', file=sys.stderr)
     pass
 
 
 class Warning(Warning):
-    print('WARNING!')
-    pass
\ No newline at end of file
+    print('WARNING!', file=sys.stderr)
+    pass
@@ -0,0 +1,192 @@
+# Per-class feature tables.
+#
+# A table holds every attribute and method visible in a class (own and
+# inherited), pointing at the AST node that defines it. Nothing is copied from
+# the parent: a table only stores the entries its own class declares and
+# resolves everything else through its parent, so a chain of classes costs
+# memory in proportion to the features actually written, not to depth times
+# features. Inherited method bodies are only ever type checked in the class
+# that defines them.
+#
+# Methods are laid out as a dispatch table (vtable): a list of slots where an
+# override takes its parent's slot index, so a method has the same index in a
+# class and in all of its descendants. `slots` maps the names this class
+# defines (new or overridden) to their index and `vtable` maps those indexes
+# to the methods; flat_vtable() builds the full list on demand.
+#
+# Attributes get the same treatment as an object layout: inherited attributes
+# first, in declaration order, then the class's own ones. An attribute's offset
+# never changes in subclasses, so an object can be a flat array indexed by
+# offset instead of a name-keyed dict. `offsets` and `layout` are the own
+# entries, flat_layout() is the full list.
+#
+# A lookup walks up to the nearest class that defines the name, skipping
+# classes without attributes (or methods), and is memoized per table. Every
+# table in a hierarchy shares the set of names defined anywhere in it, so a
+# name no class defines is a miss without any walk.
+
+class FeatureTable:
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        # name -> offset / slot of the attributes and methods this class defines
+        self.offsets = {}
+        self.slots = {}
+        # offset -> Attr and slot -> Method for the same entries
+        self.layout = {}
+        self.vtable = {}
+        if parent is None:
+            self.attribute_count = 0
+            self.method_count = 0
+            self.attribute_names = set()
+            self.method_names = set()
+            self.attribute_parent = None
+            self.method_parent = None
+        else:
+            self.attribute_count = parent.attribute_count
+            self.method_count = parent.method_count
+            self.attribute_names = parent.attribute_names
+            self.method_names = parent.method_names
+            # nearest ancestors defining any attribute / method, walks skip the rest
+            self.attribute_parent = parent if parent.layout else parent.attribute_parent
+            self.method_parent = parent if parent.vtable else parent.method_parent
+        # name -> resolved Attr / Method, filled by lookups
+        self._attributes = {}
+        self._methods = {}
+
+    def attribute_tables(self):
+        '''this table and its ancestors that define attributes, nearest first'''
+        table = self if self.layout else self.attribute_parent
+        while table is not None:
+            yield table
+            table = table.attribute_parent
+
+    def method_tables(self):
+        '''this table and its ancestors that define methods, nearest first'''
+        table = self if self.vtable else self.method_parent
+        while table is not None:
+            yield table
+            table = table.method_parent
+
+    def attribute_offset(self, name):
+        if name in self.attribute_names:
+            for table in self.attribute_tables():
+                offset = table.offsets.get(name)
+                if offset is not None:
+                    return offset
+        return None
+
+    def method_slot(self, name):
+        if name in self.method_names:
+            for table in self.method_tables():
+                slot = table.slots.get(name)
+                if slot is not None:
+                    return slot
+        return None
+
+    def add_attribute(self, attr):
+        name = attr.ident.name
+        offset = self.attribute_offset(name)
+        if offset is None:
+            offset = self.attribute_count
+            self.attribute_count += 1
+            self.attribute_names.add(name)
+        self.offsets[name] = offset
+        self.layout[offset] = attr
+        self._attributes.pop(name, None)
+
+    def lookup_attribute(self, name):
+        attr = self._attributes.get(name)
+        if attr is None and name in self.attribute_names:
+            for table in self.attribute_tables():
+                offset = table.offsets.get(name)
+                if offset is not None:
+                    attr = self._attributes[name] = table.layout[offset]
+                    break
+        return attr
+
+    def flat_layout(self):
+        '''every visible Attr, indexed by offset'''
+        layout = [None] * self.attribute_count
+        missing = self.attribute_count
+        for table in self.attribute_tables():
+            if not missing:
+                break
+            for offset, attr in table.layout.items():
+                if layout[offset] is None:
+                    layout[offset] = attr
+                    missing -= 1
+        return layout
+
+    def attributes(self):
+        '''(name, Attr) for every attribute in offset order'''
+        for attr in self.flat_layout():
+            yield attr.ident.name, attr
+
+    def attribute_type(self, attr):
+        '''static type of attr in this class, SELF_TYPE is this class'''
+        return self.name if attr.type == 'SELF_TYPE' else attr.type
+
+    def layout_types(self):
+        return [self.attribute_type(attr) for attr in self.flat_layout()]
+
+    def add_method(self, method):
+        name = method.ident.name
+        slot = self.method_slot(name)
+        if slot is None:
+            slot = self.method_count
+            self.method_count += 1
+            self.method_names.add(name)
+        self.slots[name] = slot
+        self.vtable[slot] = method
+        self._methods.pop(name, None)
+
+    def lookup_method(self, name):
+        method = self._methods.get(name)
+        if method is None and name in self.method_names:
+            for table in self.method_tables():
+                slot = table.slots.get(name)
+                if slot is not None:
+                    method = self._methods[name] = table.vtable[slot]
+                    break
+        return method
+
+    def flat_vtable(self):
+        '''(owner class, Method) for every slot'''
+        vtable = [None] * self.method_count
+        missing = self.method_count
+        for table in self.method_tables():
+            if not missing:
+                break
+            for slot, method in table.vtable.items():
+                if vtable[slot] is None:
+                    vtable[slot] = (table.name, method)
+                    missing -= 1
+        return vtable
+
+    def methods(self):
+        '''(name, Method) for every method in slot order'''
+        for _, method in self.flat_vtable():
+            yield method.ident.name, method
+
+    def inherited_attribute(self, name):
+        return self.parent is not None and self.parent.attribute_offset(name) is not None
+
+    def inherited_method(self, name):
+        if self.parent is None:
+            return None
+        return self.parent.lookup_method(name)
+
+    def interface(self):
+        '''
+        What typing another class can observe of this one: the attribute layout
+        and the method signatures by slot, inherited entries included.
+        '''
+        attributes = tuple((attr.ident.name, self.attribute_type(attr)) for attr in self.flat_layout())
+        methods = tuple((name, method_signature(method)) for name, method in self.methods())
+        return attributes, methods
+
+
+def method_signature(method):
+    '''Formal types in order plus the return type, what an override must keep'''
+    return tuple(formal.type for formal in method.formals) + (method.type,)
@@ -0,0 +1,78 @@
+# Class hierarchy index.
+#
+# Numbers the inheritance tree in preorder. Every class gets the interval
+# [pre, end) covering itself and all of its descendants, so "is A a subtype
+# of B" is two integer comparisons instead of a walk over B's subtree.
+# Jump pointers to the ancestors answer join (least common ancestor) queries.
+
+class ClassHierarchy:
+    def __init__(self, graph, root="Object"):
+        '''graph maps a class name to the set of its direct children'''
+        self.root = root
+        self.pre = {}
+        self.end = {}
+        self.parent = {root: None}
+        self.depth = {root: 0}
+
+        # Iterative DFS: inheritance chains can be much deeper than the recursion limit
+        counter = 0
+        stack = [(root, False)]
+        while stack:
+            name, done = stack.pop()
+            if done:
+                self.end[name] = counter
+                continue
+            self.pre[name] = counter
+            counter += 1
+            stack.append((name, True))
+            children = sorted(graph.get(name, ()), reverse=True)
+            for child in children:
+                self.parent[child] = name
+                self.depth[child] = self.depth[name] + 1
+                stack.append((child, False))
+
+        # up[k][name] is the 2**k-th ancestor of name
+        self.up = [{name: parent for name, parent in self.parent.items() if parent is not None}]
+        while len(self.up[-1]) > 0:
+            previous = self.up[-1]
+            self.up.append({name: previous[mid] for name, mid in previous.items() if mid in previous})
+        self.up.pop()
+
+    def __contains__(self, name):
+        return name in self.pre
+
+    def is_subtype(self, child, parent):
+        '''True if child is parent or one of its descendants'''
+        if child == parent:
+            return True
+        pre = self.pre
+        if child not in pre or parent not in pre:
+            return False
+        return pre[parent] <= pre[child] < self.end[parent]
+
+    def join(self, a, b):
+        '''
+        Least common ancestor of a and b, the least type both conform to.
+        A type outside the hierarchy, None included, only conforms to the root.
+        '''
+        if a not in self.pre or b not in self.pre:
+            return self.root
+        # Climb from a with jump pointers (binary lifting) while its subtree
+        # does not contain b, so the cost is O(log depth) even on long chains
+        pre, end, up = self.pre, self.end, self.up
+        pre_b = pre[b]
+        if pre[a] <= pre_b < end[a]:
+            return a
+        for level in reversed(up):
+            ancestor = level.get(a)
+            if ancestor is not None and not (pre[ancestor] <= pre_b < end[ancestor]):
+                a = ancestor
+        return self.parent[a]
+
+    def join_all(self, names):
+        '''join of every name, None when there are none'''
+        names = iter(names)
+        result = next(names, None)
+        for name in names:
+            result = self.join(result, name)
+        return result
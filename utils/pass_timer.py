@@ -0,0 +1,142 @@
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from utils.ast_helper import iter_nodes
+
+# Per-pass cost instrumentation.
+#
+# Every compiler pass runs inside measure(phase, name, tree). With no
+# subscriber that is a plain context manager and costs nothing else. Once a
+# hook is subscribed, each pass produces a record
+#
+#   {'phase': 'semantic', 'pass': 'expand_inherited_classes',
+#    'wall': seconds, 'cpu': seconds, 'nodes': AST nodes, 'peak_bytes': bytes}
+#
+# and every hook is called with it as soon as the pass ends. peak_bytes is how
+# far traced memory rose above where it stood when the pass started, at its
+# highest, only present while tracemalloc is tracing (see trace_memory).
+# Passes may nest: an inner pass resets the tracemalloc peak, so the peak
+# reached so far is first folded into every enclosing pass. nodes counts the
+# tree the pass ran over, it is counted before the clocks start so it is not
+# part of the pass's cost. A pass that
+# builds its tree stores it in record['output'] instead, which is counted
+# once the clocks have stopped. Passes over something other than the AST
+# (e.g. Bril instructions) pass their own count as nodes. A pass may add
+# counters of its own to the record (e.g. the inliner's call sites inlined);
+# the report prints them after the standard columns.
+#
+# Lexing is driven by the parser token by token, so it is measured together
+# with parsing as the 'parse' pass.
+
+_hooks = []
+# [traced bytes at start, highest peak before the last reset] per open pass
+_open = []
+
+def subscribe(hook):
+    _hooks.append(hook)
+
+def unsubscribe(hook):
+    _hooks.remove(hook)
+
+def trace_memory(enable=True):
+    if enable and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enable and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def count_nodes(tree):
+    return sum(1 for _ in iter_nodes(tree)) if tree is not None else None
+
+@contextmanager
+def measure(phase, name, tree=None, nodes=None):
+    if not _hooks:
+        yield
+        return
+
+    record = {'phase': phase, 'pass': name, 'nodes': count_nodes(tree) if nodes is None else nodes}
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        for frame in _open:
+            frame[1] = max(frame[1], peak)
+        tracemalloc.reset_peak()
+        frame = [current, current]
+        _open.append(frame)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        record['wall'] = time.perf_counter() - wall
+        record['cpu'] = time.process_time() - cpu
+        if tracing:
+            _open.remove(frame)
+            peak = max(frame[1], tracemalloc.get_traced_memory()[1]) if tracemalloc.is_tracing() else frame[1]
+            record['peak_bytes'] = peak - frame[0]
+        if 'output' in record:
+            record['nodes'] = count_nodes(record.pop('output'))
+        for hook in list(_hooks):
+            hook(record)
+
+
+# record keys every pass has, the rest are the pass's own counters
+_columns = ('phase', 'pass', 'wall', 'cpu', 'nodes', 'peak_bytes')
+
+
+class PassLog:
+    """A hook that keeps every record, for the --time-passes/--mem-passes report"""
+
+    def __init__(self, show=True, json_path=None):
+        self.records = []
+        self.show = show
+        self.json_path = json_path
+
+    def __call__(self, record):
+        self.records.append(record)
+
+    def report(self, file=sys.stderr):
+        memory = any('peak_bytes' in record for record in self.records)
+        header = '%-10s %-30s %10s %10s %10s' % ('phase', 'pass', 'wall ms', 'cpu ms', 'nodes')
+        print(header + (' %12s' % 'peak KiB' if memory else ''), file=file)
+        for record in self.records:
+            line = '%-10s %-30s %10.2f %10.2f %10s' % (
+                record['phase'], record['pass'], record['wall'] * 1000, record['cpu'] * 1000,
+                '-' if record['nodes'] is None else record['nodes'])
+            if memory:
+                line += ' %12.1f' % (record.get('peak_bytes', 0) / 1024)
+            line += ''.join('  %s=%s' % (key, value) for key, value in record.items() if key not in _columns)
+            print(line, file=file)
+        print('%-41s %10.2f %10.2f' % ('total', sum(r['wall'] for r in self.records) * 1000,
+                                       sum(r['cpu'] for r in self.records) * 1000), file=file)
+
+    def to_json(self):
+        return json.dumps({'passes': self.records}, indent=2)
+
+
+def from_argv(argv):
+    '''
+    Subscribe a PassLog if argv asks for one: --time-passes, --mem-passes (adds the
+    peak memory of each pass) and --passes-json=PATH (the records as JSON, '-' for stdout).
+    Returns the log, to hand to finish() once the compilation is done, or None.
+    '''
+    json_paths = [arg.split('=', 1)[1] for arg in argv if arg.startswith('--passes-json=')]
+    if '--time-passes' not in argv and '--mem-passes' not in argv and not json_paths:
+        return None
+    log = PassLog('--time-passes' in argv or '--mem-passes' in argv, json_paths[-1] if json_paths else None)
+    trace_memory('--mem-passes' in argv)
+    subscribe(log)
+    return log
+
+def finish(log):
+    if log is None:
+        return
+    unsubscribe(log)
+    if log.show:
+        log.report()
+    if log.json_path == '-':
+        print(log.to_json())
+    elif log.json_path is not None:
+        with open(log.json_path, 'w') as f:
+            f.write(log.to_json() + '\n')
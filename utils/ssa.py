@@ -0,0 +1,212 @@
+from utils.cfg import CFG
+
+# Static single assignment form of Bril functions.
+#
+# to_ssa places phi nodes at the iterated dominance frontier of the blocks
+# defining a variable (only for variables read in some block before that
+# block defines them) and renames every definition to a fresh name walking
+# the dominator tree, so each variable has exactly one definition:
+#
+#   {'op': 'phi', 'dest': 'i.2', 'type': 'int', 'args': ['i.1', 'i.3'], 'labels': ['entry.0', 'loop.2']}
+#
+# takes i.1 when control came from entry.0 and i.3 when it came from loop.2.
+# A variable not defined along some predecessor reads UNDEFINED there.
+# Function arguments keep their names. The SSA form keeps every label and
+# jmp, since phis name their predecessors by label.
+#
+# from_ssa replaces the phis by copies at the end of the predecessors. The
+# copies on one edge are a parallel assignment, so they are ordered (with a
+# temporary where they form a cycle) to not read a variable another copy on
+# that edge already overwrote; an edge from a block with more than one
+# successor is split, so the copies only run on it. Straight-line chains of
+# blocks are then merged and a value computed just to be copied into the
+# phi's variable is computed into it directly.
+
+UNDEFINED = '__undefined'
+
+
+def to_ssa(instrs, args=(), max_iterations=None):
+    '''
+    instrs of a function with the given (name, type) args in SSA form.
+    max_iterations bounds the dominator computation (utils.cfg.IterationLimit).
+    '''
+    cfg = CFG(instrs)
+    cfg.remove_unreachable()
+    idom = cfg.dominators(max_iterations)
+    tree = cfg.dominator_tree(idom)
+    frontier = cfg.frontier(idom)
+
+    types = dict(args)
+    defs = {name: set() for name, _ in args}
+    read_before_def = set()
+    for name in cfg.order:
+        defined = set()
+        for instr in cfg.blocks[name]:
+            for arg in instr.get('args', ()):
+                if arg not in defined:
+                    read_before_def.add(arg)
+            dest = instr.get('dest')
+            if dest is not None:
+                defined.add(dest)
+                types[dest] = instr['type']
+                defs.setdefault(dest, set()).add(name)
+    for arg, _ in args:
+        defs[arg].add(cfg.entry)
+
+    # variable -> blocks that need a phi for it
+    phis = {name: [] for name in cfg.order}
+    for var in sorted(read_before_def & set(defs)):
+        placed = set()
+        work = list(defs[var])
+        while work:
+            block = work.pop()
+            for join in frontier[block]:
+                if join not in placed:
+                    placed.add(join)
+                    phis[join].append({'op': 'phi', 'dest': var, 'type': types[var], 'args': [], 'labels': []})
+                    if join not in defs[var]:
+                        work.append(join)
+
+    names = Names(types)
+    stacks = {var: [var] for var, _ in args}
+    for name in cfg.order:
+        block = cfg.blocks[name]
+        block[1:1] = phis[name]
+
+    # walk the dominator tree, popping the names a block pushed once its subtree is done
+    original = {}   # id(instr) -> the variable its dest renames
+    work = [(cfg.entry, True)]
+    while work:
+        name, entering = work.pop()
+        block = cfg.blocks[name]
+        if not entering:
+            for instr in block:
+                if 'dest' in instr:
+                    stacks[original[id(instr)]].pop()
+            continue
+
+        for instr in block:
+            if instr.get('op') != 'phi' and 'args' in instr:
+                instr['args'] = [stacks[arg][-1] if stacks.get(arg) else arg for arg in instr['args']]
+            dest = instr.get('dest')
+            if dest is not None:
+                original[id(instr)] = dest
+                instr['dest'] = names.fresh(dest)
+                stacks.setdefault(dest, []).append(instr['dest'])
+        for succ in cfg.succs[name]:
+            for phi in phis[succ]:
+                var = original.get(id(phi), phi['dest'])
+                phi['args'].append(stacks[var][-1] if stacks.get(var) else UNDEFINED)
+                phi['labels'].append(name)
+
+        work.append((name, False))
+        for child in reversed(tree[name]):
+            work.append((child, True))
+    return cfg.instrs(compact=False)
+
+
+class Names:
+    '''Fresh variable names: var.1, var.2, ... skipping names already in use'''
+
+    def __init__(self, taken):
+        self.taken = set(taken)
+        self.counters = {}
+
+    def fresh(self, var):
+        n = self.counters.get(var, 0)
+        while True:
+            n += 1
+            name = '%s.%d' % (var, n)
+            if name not in self.taken:
+                break
+        self.counters[var] = n
+        self.taken.add(name)
+        return name
+
+
+def from_ssa(instrs):
+    '''instrs of a function in SSA form, without the phis'''
+    cfg = CFG(instrs)
+    names = Names(instr['dest'] for instr in instrs if 'dest' in instr)
+
+    # (pred, block) -> [(dest, arg, type)]
+    copies = {}
+    for name in cfg.order:
+        block = cfg.blocks[name]
+        phis = [instr for instr in block if instr.get('op') == 'phi']
+        for phi in phis:
+            for arg, pred in zip(phi['args'], phi['labels']):
+                if arg != UNDEFINED and arg != phi['dest']:
+                    copies.setdefault((pred, name), []).append((phi['dest'], arg, phi['type']))
+        if phis:
+            block[:] = [instr for instr in block if instr.get('op') != 'phi']
+
+    for (pred, name), parallel in copies.items():
+        if pred not in cfg.blocks:
+            continue
+        sequence = [{'op': 'id', 'dest': dest, 'type': type, 'args': [arg]}
+                    for dest, arg, type in _sequentialize(parallel, names)]
+        last = cfg.blocks[pred][-1]
+        if len(cfg.succs[pred]) > 1:
+            # a critical edge: the copies go in a block of their own on it
+            split = cfg.add_block(pred, sequence + [{'op': 'jmp', 'args': [], 'labels': [name]}])
+            last['labels'] = [split if label == name else label for label in last['labels']]
+        else:
+            cfg.blocks[pred][-1:-1] = sequence
+    cfg.edges()
+
+    cfg.merge_blocks()
+    _coalesce(cfg)
+    return cfg.instrs()
+
+
+def _sequentialize(parallel, names):
+    '''Order the copies of a parallel assignment, breaking cycles with temporaries'''
+    pending = {dest: (arg, type) for dest, arg, type in parallel}
+    sequence = []
+    while pending:
+        read = {arg for arg, _ in pending.values()}
+        ready = [dest for dest in pending if dest not in read]
+        if ready:
+            for dest in ready:
+                arg, type = pending.pop(dest)
+                sequence.append((dest, arg, type))
+            continue
+        # every pending dest is still read: save one and read the copy instead
+        dest = next(iter(pending))
+        type = pending[dest][1]
+        temp = names.fresh(dest)
+        sequence.append((temp, dest, type))
+        pending = {d: ((temp if arg == dest else arg), t) for d, (arg, t) in pending.items()}
+    return sequence
+
+
+def _coalesce(cfg):
+    '''
+    x = op a b; ...; d = id x  becomes  d = op a b; ...  when the copy is x's only
+    use and nothing between the two reads or writes d.
+    '''
+    uses = {}
+    for name in cfg.order:
+        for instr in cfg.blocks[name]:
+            for arg in instr.get('args', ()):
+                uses[arg] = uses.get(arg, 0) + 1
+
+    for name in cfg.order:
+        block = cfg.blocks[name]
+        defined_at = {}
+        dead = set()
+        for i, instr in enumerate(block):
+            if instr.get('op') == 'id' and uses.get(instr['args'][0]) == 1 and instr['args'][0] in defined_at:
+                dest, j = instr['dest'], defined_at[instr['args'][0]]
+                if not any(dest in between.get('args', ()) or between.get('dest') == dest
+                           for between in block[j + 1:i]):
+                    block[j]['dest'] = dest
+                    dead.add(i)
+                    defined_at.pop(instr['args'][0])
+                    defined_at[dest] = j
+                    continue
+            if 'dest' in instr:
+                defined_at[instr['dest']] = i
+        if dead:
+            block[:] = [instr for i, instr in enumerate(block) if i not in dead]
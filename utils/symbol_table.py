@@ -0,0 +1,37 @@
+# Scoped symbol table.
+#
+# All visible names live in one flat dict, so a lookup is a single probe no
+# matter how deeply scopes are nested. Each scope keeps an undo log of the
+# bindings it shadowed; popping the scope replays the log backwards. push,
+# define, lookup and pop are all O(1) (pop is O(names defined in the scope)).
+
+_missing = object()
+
+class SymbolTable:
+    def __init__(self):
+        self.symbols = {}
+        self.undo_logs = []
+
+    def push(self):
+        self.undo_logs.append([])
+
+    def pop(self):
+        symbols = self.symbols
+        for name, previous in reversed(self.undo_logs.pop()):
+            if previous is _missing:
+                del symbols[name]
+            else:
+                symbols[name] = previous
+
+    def define(self, name, value):
+        self.undo_logs[-1].append((name, self.symbols.get(name, _missing)))
+        self.symbols[name] = value
+
+    def lookup(self, name, default=None):
+        return self.symbols.get(name, default)
+
+    def __contains__(self, name):
+        return name in self.symbols
+
+    def depth(self):
+        return len(self.undo_logs)
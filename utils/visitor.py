@@ -0,0 +1,91 @@
+from utils.ast_helper import type_fields
+
+# Table-driven dispatch on AST node classes.
+#
+# A pass names its handlers <prefix><key>, where key is a type_fields key
+# (e.g. infer_BinOp, check_If, emit_FunctCall) or one of the literal keys below.
+# dispatch_table() maps each node class to its bound handler once, so visiting
+# a node is a single dict lookup on type(node) instead of an isinstance chain.
+# Node classes are final, so matching on the exact class is enough.
+
+# Literals are plain python values in the ast. bool is looked up before it
+# can be mistaken for an int because the match is on the exact class.
+literal_types = {
+    'Int': int,
+    'Bool': bool,
+    'String': str,
+}
+
+def dispatch_table(obj, prefix):
+    table = {}
+    for key, cls in list(type_fields.items()) + list(literal_types.items()):
+        handler = getattr(obj, prefix + key, None)
+        if handler is not None:
+            table[cls] = handler
+    return table
+
+_done = object()
+
+def walk(root, handlers, *args, after=None):
+    '''
+    Visit root with handlers from dispatch_table() without python recursion.
+
+    A handler that needs a child visited first yields it, which makes it a
+    generator: it is resumed once the child's whole subtree is done, so it can
+    read the child's inferred type right after the yield. Handlers for leaves
+    can be plain functions. Suspended handlers live on an explicit stack, so
+    the nesting depth is bounded by memory, not by the recursion limit.
+
+    after is an optional second table of plain functions, called with the same
+    arguments once a node's handler has finished, i.e. when its whole subtree
+    is done. It lets a pass validate a node in the same visit that typed it.
+    '''
+    if after is not None:
+        return _walk_after(root, handlers, after, args)
+    stack = []
+    push = stack.append
+    get = handlers.get
+    done = _done
+    node = root
+    while True:
+        handler = get(node.__class__)
+        if handler is not None:
+            pending = handler(node, *args)
+            if pending is not None:
+                push(pending)
+        while stack:
+            node = next(stack[-1], done)
+            if node is not done:
+                break
+            stack.pop()
+        else:
+            return
+
+def _walk_after(root, handlers, after, args):
+    # Same loop as walk, the stack also keeps the node each generator belongs to
+    stack = []
+    push = stack.append
+    get = handlers.get
+    get_after = after.get
+    done = _done
+    node = root
+    while True:
+        handler = get(node.__class__)
+        pending = handler(node, *args) if handler is not None else None
+        if pending is not None:
+            push((pending, node))
+        else:
+            check = get_after(node.__class__)
+            if check is not None:
+                check(node, *args)
+        while stack:
+            pending, node = stack[-1]
+            node = next(pending, done)
+            if node is not done:
+                break
+            node = stack.pop()[1]
+            check = get_after(node.__class__)
+            if check is not None:
+                check(node, *args)
+        else:
+            return